@@ -14,6 +14,7 @@ from app.tools.approval_tools import list_pending_approvals, approve_order, reje
 from app.tools.sms_tools import notify_manager
 from app.tools.manual_payment_tools import get_pending_manual_payments, confirm_manual_payment, reject_manual_payment
 from app.tools.order_utility_tools import get_recent_orders, search_order_by_customer, view_order_details
+import asyncio
 import logging
 from datetime import datetime
 
@@ -45,6 +46,56 @@ ADMIN_TOOLS = [
     get_top_customers,
 ]
 
+# Tools that only read state; several of these in one response run concurrently
+READ_ONLY_TOOLS = {
+    "list_pending_approvals",
+    "get_pending_manual_payments",
+    "get_recent_orders",
+    "search_order_by_customer",
+    "view_order_details",
+    "get_incident_context",
+    "get_top_customers",
+}
+
+
+async def _run_admin_tool(name: str, args: dict):
+    """Dispatch one LLM tool call to its admin tool."""
+    logger.info(f"Admin Worker calling tool: {name}")
+    if name == "generate_comprehensive_report":
+        return await generate_comprehensive_report.ainvoke(args)
+    elif name == "list_pending_approvals":
+        return await list_pending_approvals.ainvoke(args)
+    elif name == "approve_order":
+        return await approve_order.ainvoke(args)
+    elif name == "reject_order":
+        return await reject_order.ainvoke(args)
+    elif name == "get_pending_manual_payments":
+        return await get_pending_manual_payments.ainvoke(args)
+    elif name == "confirm_manual_payment":
+        return await confirm_manual_payment.ainvoke(args)
+    elif name == "reject_manual_payment":
+        return await reject_manual_payment.ainvoke(args)
+    elif name == "get_recent_orders":
+        return await get_recent_orders.ainvoke(args)
+    elif name == "search_order_by_customer":
+        return await search_order_by_customer.ainvoke(args)
+    elif name == "view_order_details":
+        return await view_order_details.ainvoke(args)
+    elif name == "relay_message_to_customer":
+        return await relay_message_to_customer.ainvoke(args)
+    elif name == "notify_manager":
+        return await notify_manager.ainvoke(args)
+    elif name == "get_incident_context":
+        return await get_incident_context.ainvoke(args)
+    elif name == "resolve_incident":
+        return await resolve_incident.ainvoke(args)
+    elif name == "report_incident":
+        return await report_incident.ainvoke(args)
+    elif name == "get_top_customers":
+        return await get_top_customers.ainvoke(args)
+    else:
+        return f"Unknown tool: {name}"
+
 
 async def admin_worker_node(state: AgentState):
     """Executes admin tasks: reports, approvals, customer messaging, incident handling."""
@@ -92,7 +143,7 @@ async def admin_worker_node(state: AgentState):
         system_prompt = f"""You are the Admin Operations Manager for Ashandy Cosmetics.
 ## 📋 AVAILABLE TOOLS ({len(ADMIN_TOOLS)} tools)
 **Order Management:**
-- `get_recent_orders(limit, hours)` - View recent orders
+- `get_recent_orders(limit, hours, before)` - View recent orders (`before` = "Next page" cursor)
 - `search_order_by_customer(customer_phone)` - Find customer's orders  
 - `view_order_details(order_id)` - See full order details
 - `list_pending_approvals()` - High-value orders awaiting approval
@@ -154,47 +205,17 @@ Manager: {state.get('user_id', 'Unknown')} | Pending Approvals: {pending_count}
         tool_evidence = []
         
         if response.tool_calls:
-            for tc in response.tool_calls:
-                name = tc["name"]
-                args = tc["args"]
-                logger.info(f"Admin Worker calling tool: {name}")
-                
-                tool_output = ""
-                if name == "generate_comprehensive_report":
-                    tool_output = await generate_comprehensive_report.ainvoke(args)
-                elif name == "list_pending_approvals":
-                    tool_output = await list_pending_approvals.ainvoke(args)
-                elif name == "approve_order":
-                    tool_output = await approve_order.ainvoke(args)
-                elif name == "reject_order":
-                    tool_output = await reject_order.ainvoke(args)
-                elif name == "get_pending_manual_payments":
-                    tool_output = await get_pending_manual_payments.ainvoke(args)
-                elif name == "confirm_manual_payment":
-                    tool_output = await confirm_manual_payment.ainvoke(args)
-                elif name == "reject_manual_payment":
-                    tool_output = await reject_manual_payment.ainvoke(args)
-                elif name == "get_recent_orders":
-                    tool_output = await get_recent_orders.ainvoke(args)
-                elif name == "search_order_by_customer":
-                    tool_output = await search_order_by_customer.ainvoke(args)
-                elif name == "view_order_details":
-                    tool_output = await view_order_details.ainvoke(args)
-                elif name == "relay_message_to_customer":
-                    tool_output = await relay_message_to_customer.ainvoke(args)
-                elif name == "notify_manager":
-                    tool_output = await notify_manager.ainvoke(args)
-                elif name == "get_incident_context":
-                    tool_output = await get_incident_context.ainvoke(args)
-                elif name == "resolve_incident":
-                    tool_output = await resolve_incident.ainvoke(args)
-                elif name == "report_incident":
-                    tool_output = await report_incident.ainvoke(args)
-                elif name == "get_top_customers":
-                    tool_output = await get_top_customers.ainvoke(args)
-                else:
-                    tool_output = f"Unknown tool: {name}"
-                
+            calls = [(tc["name"], tc["args"]) for tc in response.tool_calls]
+            if len(calls) > 1 and all(name in READ_ONLY_TOOLS for name, _ in calls):
+                # Lookups only (e.g. incidents + pending approvals): run them together
+                async with asyncio.TaskGroup() as tg:
+                    tasks = [tg.create_task(_run_admin_tool(name, args)) for name, args in calls]
+                outputs = [task.result() for task in tasks]
+            else:
+                # Writes keep the order the LLM asked for (approve, then list, ...)
+                outputs = [await _run_admin_tool(name, args) for name, args in calls]
+            
+            for (name, args), tool_output in zip(calls, outputs):
                 tool_evidence.append({"tool": name, "args": args, "output": str(tool_output)[:500]})
                 final_result += f"\n\n{tool_output}"
         
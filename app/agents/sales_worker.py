@@ -380,20 +380,18 @@ Failure to call these exact tools will result in task rejection.
             tool_evidence = await execute_tools_smart(response.tool_calls, execute_tool)
             
             # ========== UPDATE CART STATE BASED ON TOOL CALLS ==========
-            import re
             for evidence in tool_evidence:
                 tool_name = evidence.get("tool")
                 tool_args = evidence.get("args", {})
                 tool_output = evidence.get("output", "")
                 
                 # Add to cart
-                if tool_name == "add_to_cart" and "✅ Added" in tool_output:
-                    # Extract product details from tool output
-                    match = re.search(r'Added \*(.+?)\* x(\d+) \(₦([\d,]+)', tool_output)
-                    if match:
-                        product_name = match.group(1).strip()
-                        quantity = int(match.group(2))
-                        price = float(match.group(3).replace(',', ''))
+                if tool_name == "add_to_cart":
+                    added = evidence.get("data") or {}
+                    if added.get("status") == "ok":
+                        product_name = added["name"]
+                        quantity = int(added["qty"])
+                        price = float(added["unit_price"])
                         
                         # Check if product already in cart
                         existing_item = next((item for item in ordered_items if item['name'].lower() == product_name.lower()), None)
@@ -40,7 +40,7 @@ async def supervisor_agent_node(state: AgentState):
         msg_id = last_message.additional_kwargs.get("id") or getattr(last_message, "id", None)
         if msg_id and state.get("platform") == "whatsapp":
             from app.services.meta_service import meta_service
-            await meta_service.mark_whatsapp_message_read(msg_id)
+            meta_service.mark_whatsapp_message_read(msg_id)
             
         # Extract content
         content_text = ""
@@ -77,6 +77,18 @@ try:
 except ImportError:
     MCP_SERVICE_AVAILABLE = False
 
+try:
+    from app.services.meta_service import meta_service
+    META_SERVICE_AVAILABLE = True
+except ImportError:
+    META_SERVICE_AVAILABLE = False
+
+try:
+    from app.services.profile_service import profile_service
+    PROFILE_SERVICE_AVAILABLE = True
+except ImportError:
+    PROFILE_SERVICE_AVAILABLE = False
+
 
 
 # -------------------------------------------------
@@ -107,6 +119,10 @@ async def lifespan(app: FastAPI):
     logger.info("🚀 Lifespan entered")
     logger.info(f"Starting {settings.APP_NAME}")
 
+    # Bind the shared Meta/Twilio HTTP client to the serving loop
+    if META_SERVICE_AVAILABLE:
+        await meta_service.startup()
+
     async def background_startup():
         logger.info("⏳ Background startup beginning...")
         # -------------------------
@@ -186,6 +202,19 @@ async def lifespan(app: FastAPI):
         except Exception:
             pass
 
+    if META_SERVICE_AVAILABLE:
+        try:
+            await meta_service.aclose()
+        except Exception:
+            pass
+
+    # Flush write-behind profile updates before the DB pool goes away
+    if PROFILE_SERVICE_AVAILABLE:
+        try:
+            await profile_service.aclose()
+        except Exception:
+            pass
+
     if hasattr(app.state, "checkpointer_context"):
         try:
             await app.state.checkpointer_context.__aexit__(None, None, None)
@@ -1,8 +1,8 @@
-from sqlalchemy import Column, String, Boolean, Float, Integer, ForeignKey, DateTime, Text, JSON
+from sqlalchemy import Column, String, Boolean, Float, Integer, ForeignKey, Date, DateTime, Text, JSON
 from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy.sql import func
 import uuid
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 
 Base = declarative_base()
 
@@ -108,3 +108,17 @@ class LeadScore(Base):
     last_order_date = Column(DateTime(timezone=True))
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
+
+class DailySummary(Base):
+    """Pre-computed daily aggregates for weekly reports (one row per date)."""
+    __tablename__ = "daily_summaries"
+
+    date = Column(Date, primary_key=True)
+    total_orders = Column(Integer, default=0)
+    total_revenue = Column(Float, default=0.0)
+    unique_users = Column(Integer, default=0)
+    total_messages = Column(Integer, default=0)
+    avg_sentiment = Column(Float, default=0.0)
+    top_products = Column(JSONB, default=list)
+    stockout_requests = Column(JSONB, default=list)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
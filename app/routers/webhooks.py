@@ -1,9 +1,12 @@
 """
 Webhooks Router: Handles incoming messages from WhatsApp, Instagram, and Paystack.
 """
-from fastapi import APIRouter, Request, HTTPException, Header, Form, Response, BackgroundTasks
+from fastapi import APIRouter, Depends, Request, HTTPException, Header, Form, Response, BackgroundTasks
 from slowapi import Limiter
 from slowapi.util import get_remote_address
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.services.db_service import get_db
 from app.utils.config import settings
 from app.models.webhook_schemas import WhatsAppWebhookPayload, InstagramWebhookPayload
 import logging
@@ -479,9 +482,10 @@ async def receive_instagram_webhook(payload: InstagramWebhookPayload):
 
 
 @router.post("/paystack")
-async def receive_paystack_webhook(request: Request):
+async def receive_paystack_webhook(request: Request, db: AsyncSession = Depends(get_db)):
     """Handle Paystack payment webhooks with signature verification."""
     from app.services.meta_service import meta_service
+    from app.services.summary_service import summary_service
     from app.tools.db_tools import get_order_by_reference
 
     try:
@@ -502,19 +506,51 @@ async def receive_paystack_webhook(request: Request):
             amount_naira = data.get("amount", 0) / 100
             customer_email = data.get("customer", {}).get("email", "N/A")
             
+            # Update local DB status to PAID (Source of Truth). Idempotent: only
+            # rows not yet PAID change, so Paystack retries / concurrent deliveries
+            # of the same event don't race or re-notify the manager. The same
+            # statement reports whether the reference has a local row at all:
+            # orders normally live in the POS, so most references have none.
+            marked = await db.execute(
+                text("""
+                    WITH updated AS (
+                        UPDATE orders SET status = 'PAID'
+                        WHERE paystack_reference = :ref AND status IS DISTINCT FROM 'PAID'
+                        RETURNING 1
+                    )
+                    SELECT EXISTS (SELECT 1 FROM updated) AS updated,
+                           EXISTS (SELECT 1 FROM orders WHERE paystack_reference = :ref) AS known
+                """),
+                {"ref": reference}
+            )
+            first_update, known = marked.one()
+            await db.commit()
+            
+            if known and not first_update:
+                logger.info(f"Duplicate Paystack webhook for {reference}, already PAID")
+                return {"status": "processed"}
+            
+            try:
+                order = await get_order_by_reference.ainvoke(reference)
+            except Exception:
+                order = {}
+
+            if not isinstance(order, dict):
+                order = {}
+            
+            details = order.get("details", {})
+            items = details.get("items", [])
+            
+            if first_update:
+                logger.info(f"Order {reference} marked as PAID in DB.")
+            else:
+                logger.info(f"Payment {reference} has no local order row (POS order)")
+            # Count it in today's running order tally for the daily summary
+            await summary_service.record_order(amount_naira, items)
+            
             if settings.ADMIN_PHONE_NUMBERS:
                 manager_phone = settings.ADMIN_PHONE_NUMBERS[0]
                 
-                try:
-                    order = await get_order_by_reference.ainvoke(reference)
-                except Exception:
-                    order = {}
-
-                if not isinstance(order, dict):
-                    order = {}
-                
-                details = order.get("details", {})
-                items = details.get("items", [])
                 delivery_info = details.get("delivery_details", {})
                 
                 items_str = "".join([f"- {i.get('name', 'Item')} (x{i.get('quantity', 1)}): ₦{i.get('price', 0):,.2f}\n" for i in items])
@@ -538,18 +574,6 @@ async def receive_paystack_webhook(request: Request):
                 await meta_service.send_whatsapp_text(manager_phone, msg)
                 logger.info(f"Admin notified of payment: {reference}")
                 
-            # Update local DB status to PAID (Source of Truth)
-            from app.services.db_service import AsyncSessionLocal
-            from sqlalchemy import text
-            
-            async with AsyncSessionLocal() as session:
-                await session.execute(
-                    text("UPDATE orders SET status = 'PAID' WHERE paystack_reference = :ref"),
-                    {"ref": reference}
-                )
-                await session.commit()
-                logger.info(f"Order {reference} marked as PAID in DB.")
-                
         return {"status": "processed"}
         
     except Exception as e:
@@ -3,15 +3,27 @@ Database Auto-Migration: Creates tables automatically on app startup.
 This eliminates the need to manually run psql commands.
 """
 from sqlalchemy import text
-from app.services.db_service import engine
+from app.services.db_service import autocommit_engine, engine
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
+_CONCURRENT_INDEX_RE = re.compile(r"CREATE\s+INDEX\s+CONCURRENTLY\s+IF\s+NOT\s+EXISTS\s+(\w+)", re.IGNORECASE)
+
+# An interrupted CREATE INDEX CONCURRENTLY leaves an INVALID index that IF NOT EXISTS would skip forever
+_Q_INVALID_INDEX = text("""
+    SELECT 1 FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE c.relname = :name AND pg_catalog.pg_table_is_visible(c.oid) AND NOT i.indisvalid
+""")
+
 # SQL statements to create all required tables
 CREATE_TABLES_SQL = """
 -- Enable UUID extension
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+-- Trigram operator classes for substring product lookups
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
 
 -- ============================================================
 -- CORE TABLES
@@ -42,6 +54,10 @@ CREATE TABLE IF NOT EXISTS products (
     created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Name/SKU substring search ('%term%' ILIKE) probes these instead of scanning
+CREATE INDEX IF NOT EXISTS idx_products_name_trgm ON products USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_products_sku_trgm ON products USING GIN (sku gin_trgm_ops);
+
 CREATE TABLE IF NOT EXISTS orders (
     order_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
     user_id UUID REFERENCES users(user_id),
@@ -51,6 +67,13 @@ CREATE TABLE IF NOT EXISTS orders (
     created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Hot order lookups: customer history (newest first), webhook by reference,
+-- status sweeps (e.g. abandoned carts) and recent-orders listing
+CREATE INDEX IF NOT EXISTS idx_orders_user_created ON orders(user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_orders_reference ON orders(paystack_reference);
+CREATE INDEX IF NOT EXISTS idx_orders_status_created ON orders(status, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_orders_created ON orders(created_at DESC);
+
 CREATE TABLE IF NOT EXISTS chat_sessions (
     session_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
     user_id UUID REFERENCES users(user_id),
@@ -107,6 +130,13 @@ CREATE TABLE IF NOT EXISTS daily_summaries (
     created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- "Which days was product X a top seller" containment lookups (top_products @> ...)
+CREATE INDEX IF NOT EXISTS idx_daily_summaries_top_products ON daily_summaries USING GIN (top_products jsonb_path_ops);
+
+-- Period rollups (WHERE date BETWEEN ...) read only these columns: index-only scan
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_daily_summaries_date ON daily_summaries (date)
+    INCLUDE (total_orders, total_revenue, unique_users, total_messages, avg_sentiment);
+
 CREATE TABLE IF NOT EXISTS incidents (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
     user_id VARCHAR(50) NOT NULL,
@@ -121,6 +151,8 @@ CREATE TABLE IF NOT EXISTS incidents (
 
 CREATE INDEX IF NOT EXISTS idx_incidents_user ON incidents(user_id);
 CREATE INDEX IF NOT EXISTS idx_incidents_status ON incidents(status);
+-- get_incident_context's default view: newest open/escalated incidents, LIMIT 5
+CREATE INDEX IF NOT EXISTS idx_incidents_status_created ON incidents(status, created_at DESC) WHERE status IN ('OPEN', 'ESCALATED');
 
 -- ============================================================
 -- FEEDBACK LEARNING TABLES
@@ -198,9 +230,18 @@ async def run_auto_migration():
                 continue
 
             try:
-                # Use a separate transaction for each statement
-                async with engine.begin() as conn:
-                    await conn.execute(text(clean_stmt))
+                if "CONCURRENTLY" in clean_stmt:
+                    # Not allowed inside a transaction block
+                    async with autocommit_engine.connect() as conn:
+                        index = _CONCURRENT_INDEX_RE.search(clean_stmt)
+                        if index and (await conn.execute(_Q_INVALID_INDEX, {"name": index.group(1)})).first():
+                            logger.warning(f"Dropping invalid index {index.group(1)} left by an interrupted build")
+                            await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index.group(1)}"))
+                        await conn.execute(text(clean_stmt))
+                else:
+                    # Use a separate transaction for each statement
+                    async with engine.begin() as conn:
+                        await conn.execute(text(clean_stmt))
             except Exception as e:
                 # Log specific errors but verify if it's critical
                 err_msg = str(e).lower()
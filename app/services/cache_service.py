@@ -1,6 +1,7 @@
 """
 Cache Service: Redis caching with JSON serialization.
 """
+from contextlib import asynccontextmanager
 import redis.asyncio as redis
 from app.utils.config import settings
 import logging
@@ -61,6 +62,29 @@ class CacheService:
     async def set_json(self, key: str, value: dict, ttl: int = None):
         await self.set(key, json.dumps(value), expire=ttl)
 
+    async def set_json_many(self, items: dict, ttl: int = None):
+        """Set many JSON values in one round trip (non-transactional pipeline of SET ... EX)."""
+        if not items:
+            return
+        await self.connect()
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key, value in items.items():
+                    pipe.set(key, json.dumps(value), ex=ttl or self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Redis pipeline set error: {e}")
+
+    @asynccontextmanager
+    async def pipeline(self, transaction: bool = False):
+        """
+        Queue several commands and send them in one round trip with
+        `await pipe.execute()`. Errors propagate to the caller.
+        """
+        await self.connect()
+        async with self.redis.pipeline(transaction=transaction) as pipe:
+            yield pipe
+
     async def delete(self, key: str):
         await self.connect()
         try:
@@ -68,6 +92,25 @@ class CacheService:
         except Exception as e:
             logger.error(f"Redis delete error: {e}")
 
+    async def delete_many(self, keys: list):
+        """Delete several keys in a single DEL."""
+        if not keys:
+            return
+        await self.connect()
+        try:
+            await self.redis.delete(*keys)
+        except Exception as e:
+            logger.error(f"Redis delete error: {e}")
+
+    async def scan_keys(self, pattern: str) -> list:
+        """List keys matching a glob pattern (incremental SCAN, never KEYS)."""
+        await self.connect()
+        try:
+            return [key async for key in self.redis.scan_iter(match=pattern, count=500)]
+        except Exception as e:
+            logger.error(f"Redis scan error: {e}")
+            return []
+
     async def flush(self):
         await self.connect()
         try:
@@ -92,6 +135,30 @@ class CacheService:
             logger.error(f"Redis incr error: {e}")
             return 0
 
+    async def hincr_many(self, updates: dict, expire: int = None) -> bool:
+        """
+        Atomically increment hash fields across hashes in one MULTI/EXEC round trip.
+        `updates` maps hash name -> {field: amount}; float amounts use HINCRBYFLOAT.
+        """
+        if not updates:
+            return True
+        await self.connect()
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                for name, fields in updates.items():
+                    for field, amount in fields.items():
+                        if isinstance(amount, float):
+                            pipe.hincrbyfloat(name, field, amount)
+                        else:
+                            pipe.hincrby(name, field, amount)
+                    if expire:
+                        pipe.expire(name, expire)
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Redis hincr error: {e}")
+            return False
+
     async def hset(self, name: str, key: str, value: str) -> bool:
         """Atomically set a hash field. Used for approval waitlist."""
         await self.connect()
@@ -121,6 +188,33 @@ class CacheService:
             logger.error(f"Redis hdel error: {e}")
             return False
 
+    async def hpop(self, name: str, key: str) -> bool:
+        """Atomically delete a hash field; True only if this call removed it."""
+        await self.connect()
+        try:
+            return await self.redis.hdel(name, key) == 1
+        except Exception as e:
+            logger.error(f"Redis hdel error: {e}")
+            return False
+
+    async def hlen(self, name: str) -> int:
+        """Number of fields in a hash (O(1))."""
+        await self.connect()
+        try:
+            return await self.redis.hlen(name)
+        except Exception as e:
+            logger.error(f"Redis hlen error: {e}")
+            return 0
+
+    async def hkeys(self, name: str) -> list:
+        """Field names of a hash, without their values."""
+        await self.connect()
+        try:
+            return await self.redis.hkeys(name)
+        except Exception as e:
+            logger.error(f"Redis hkeys error: {e}")
+            return []
+
     async def hgetall(self, name: str) -> dict:
         """Get all fields in a hash."""
         await self.connect()
@@ -1,7 +1,11 @@
 """
 Database Service: Async SQLAlchemy session management.
 """
+import json
+
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.engine import Result
+from sqlalchemy.sql.elements import TextClause
 from app.utils.config import settings
 
 engine = create_async_engine(
@@ -9,8 +13,13 @@ engine = create_async_engine(
     echo=settings.DEBUG,
     pool_size=settings.DB_POOL_SIZE,
     max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_pre_ping=True,  # Drop dead pooled connections instead of failing the request
+    json_serializer=json.JSONEncoder(separators=(",", ":")).encode,  # Compact JSON/JSONB binds
 )
 
+# Same pool, no BEGIN/COMMIT round trips: for single-statement writes only
+autocommit_engine = engine.execution_options(isolation_level="AUTOCOMMIT")
+
 AsyncSessionLocal = async_sessionmaker(
     bind=engine,
     class_=AsyncSession,
@@ -27,3 +36,23 @@ async def get_db():
             yield session
         finally:
             await session.close()
+
+
+async def exec_write(statement: TextClause, params: dict = None) -> Result:
+    """
+    Run one self-contained write statement in autocommit mode.
+    Rows from RETURNING are buffered, so the result is readable after return.
+    """
+    async with autocommit_engine.connect() as conn:
+        return await conn.execute(statement, params or {})
+
+
+async def exec_raw(sql: str, *args) -> str:
+    """
+    Run one statement straight on the pooled asyncpg connection (autocommit),
+    skipping SQLAlchemy's per-statement dispatch. asyncpg prepares and caches
+    the statement server-side. Use `$1, $2, ...` placeholders; hot paths only.
+    """
+    async with autocommit_engine.connect() as conn:
+        raw = await conn.get_raw_connection()
+        return await raw.driver_connection.execute(sql, *args)
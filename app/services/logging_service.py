@@ -4,6 +4,7 @@ Logging Service: Persists all messages to PostgreSQL for historical analysis.
 from sqlalchemy import text
 from app.services.db_service import AsyncSessionLocal
 import logging
+import json
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -122,6 +123,59 @@ class LoggingService:
             logger.error(f"Failed to get unique users: {e}")
             return []
 
+    
+    async def get_period_stats(
+        self,
+        start_date: datetime,
+        end_date: datetime
+    ) -> dict:
+        """
+        Message stats for a period in one scan of message_logs: total messages,
+        unique users, mean user sentiment and user intent counts.
+        
+        Used for report generation instead of fetching every message row.
+        """
+        empty = {"total_messages": 0, "unique_users": [], "avg_sentiment": 0.0, "intent_counts": {}}
+        try:
+            async with AsyncSessionLocal() as session:
+                # The CTE is referenced several times, so Postgres materializes it once
+                query = text("""
+                    WITH period AS (
+                        SELECT user_id, role, sentiment_score, intent
+                        FROM message_logs
+                        WHERE created_at BETWEEN :start_date AND :end_date
+                    ), user_msgs AS (
+                        SELECT * FROM period WHERE role = 'user'
+                    )
+                    SELECT
+                        (SELECT COUNT(*) FROM period) AS total_messages,
+                        (SELECT COALESCE(array_agg(DISTINCT user_id), '{}') FROM user_msgs) AS unique_users,
+                        (SELECT COALESCE(SUM(COALESCE(sentiment_score, 0)), 0) / GREATEST(COUNT(*), 1)
+                         FROM user_msgs) AS avg_sentiment,
+                        (SELECT COALESCE(jsonb_object_agg(intent, n), '{}')
+                         FROM (SELECT COALESCE(intent, 'other') AS intent, COUNT(*) AS n
+                               FROM user_msgs GROUP BY 1) counts) AS intent_counts
+                """)
+                result = await session.execute(query, {
+                    "start_date": start_date,
+                    "end_date": end_date
+                })
+                row = result.fetchone()
+                if not row:
+                    return empty
+                intent_counts = row.intent_counts
+                if isinstance(intent_counts, str):
+                    intent_counts = json.loads(intent_counts)
+                return {
+                    "total_messages": row.total_messages,
+                    "unique_users": list(row.unique_users),
+                    "avg_sentiment": float(row.avg_sentiment),
+                    "intent_counts": intent_counts
+                }
+        except Exception as e:
+            logger.error(f"Failed to get period stats: {e}")
+            return empty
+
 
 # Singleton instance
 logging_service = LoggingService()
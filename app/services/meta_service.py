@@ -3,13 +3,52 @@ Meta Service: WhatsApp and Instagram messaging via Meta Graph API.
 """
 import httpx
 import asyncio
-from typing import Optional
-from functools import wraps
+import json
+import re
+import time
+from typing import Any, Awaitable, Callable, Optional
+from functools import lru_cache, wraps
+from urllib.parse import urlencode
 from app.utils.config import settings
+from app.utils.ttl_cache import TTLCache
+from app.utils.dns_cache import cached_dns_transport
 import logging
 
 logger = logging.getLogger(__name__)
 
+GRAPH_API_URL = "https://graph.facebook.com/v18.0/"
+# Graph batch requests accept at most 50 sub-requests
+READ_BATCH_SIZE = 50
+READ_BATCH_WINDOW = 0.2
+# Queued notifications to one number within the window go out as one message
+NOTIFY_BATCH_SIZE = 10
+NOTIFY_BATCH_WINDOW = 0.5
+NOTIFY_SEPARATOR = "\n\n━━━━━━━━━━\n\n"
+# Cloud API limit on a text message body
+WA_TEXT_LIMIT = 4096
+
+# Pre-serialized interactive button payload; only to / body / buttons vary per call
+BUTTONS_PAYLOAD_JSON = (
+    '{"messaging_product":"whatsapp","to":%s,"type":"interactive",'
+    '"interactive":{"type":"button","body":{"text":%s},"action":{"buttons":[%s]}}}'
+)
+BUTTON_JSON = '{"type":"reply","reply":{"id":%s,"title":%s}}'
+
+TWILIO_MESSAGES_URL = "https://api.twilio.com/2010-04-01/Accounts/{sid}/Messages.json"
+
+# Nigerian local format: 0 followed by 10 digits (e.g. 08031234567)
+_NG_LOCAL = re.compile(r"0(\d{10})")
+_STRIP_WHITESPACE = str.maketrans("", "", " \t\r\n")
+
+
+def _to_e164(phone: str) -> str:
+    """Normalize a Nigerian local number to +234 E.164; other formats pass through."""
+    phone = phone.translate(_STRIP_WHITESPACE)
+    if phone.startswith(("+", "whatsapp:")):
+        return phone
+    match = _NG_LOCAL.fullmatch(phone)
+    return "+234" + match.group(1) if match else phone
+
 
 def async_retry(max_attempts: int = 3, base_delay: float = 1.0, max_delay: float = 10.0):
     """
@@ -27,7 +66,7 @@ def async_retry(max_attempts: int = 3, base_delay: float = 1.0, max_delay: float
             for attempt in range(max_attempts):
                 try:
                     return await func(*args, **kwargs)
-                except (httpx.HTTPStatusError, httpx.TimeoutException) as e:
+                except (httpx.HTTPStatusError, httpx.TimeoutException, httpx.ConnectError) as e:
                     last_exception = e
                     if attempt < max_attempts - 1:
                         delay = min(base_delay * (2 ** attempt), max_delay)
@@ -40,6 +79,114 @@ def async_retry(max_attempts: int = 3, base_delay: float = 1.0, max_delay: float
     return decorator
 
 
+class MetaCircuitBreaker:
+    """
+    In-memory circuit breaker (Closed -> Open -> HalfOpen) for Meta Graph API calls.
+    
+    After `failure_threshold` consecutive failures the breaker opens and callers
+    fail fast for `reset_timeout` seconds. The first call after that is let
+    through as a probe: success closes the breaker, failure re-opens it.
+    Only server errors (5xx) and transport failures count as failures; a 4xx
+    means Meta answered, so it counts as a success for the breaker.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def allow_request(self) -> bool:
+        """Return False while the breaker is open (or a half-open probe is in flight)."""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            logger.info(f"{self.name} circuit half-open, probing")
+            return True
+        return False
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info(f"{self.name} circuit closed")
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_error(self, error: BaseException):
+        """Record a failed call, counting it only if it points at a Meta outage."""
+        if isinstance(error, httpx.HTTPStatusError):
+            is_outage = error.response.status_code >= 500
+        else:
+            is_outage = isinstance(error, httpx.TransportError)
+        if is_outage:
+            self.record_failure()
+        else:
+            self.record_success()
+
+    def release_probe(self):
+        """
+        Call when a guarded call ends (use in `finally`). If a half-open probe
+        finished without recording an outcome (e.g. it was cancelled), let the
+        next call probe again instead of staying half-open forever.
+        """
+        if self.state == self.HALF_OPEN:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic() - self.reset_timeout
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"{self.name} circuit opened after {self.failures} failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class AsyncTokenBucket:
+    """
+    Client-side token bucket so we stay under Meta's send rate limits
+    instead of discovering them via 429s.
+    """
+
+    def __init__(self, capacity: int, refill_per_sec: float):
+        self.capacity = capacity
+        self.refill_per_sec = refill_per_sec
+        self.tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a token is available, then consume it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.refill_per_sec)
+                self._updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.refill_per_sec)
+
+
+def _pack_notifications(texts: list) -> list:
+    """Group consecutive texts so each joined body stays under WA_TEXT_LIMIT (oversized texts stand alone)."""
+    groups, current, size = [], [], 0
+    for text in texts:
+        if current and size + len(NOTIFY_SEPARATOR) + len(text) > WA_TEXT_LIMIT:
+            groups.append(current)
+            current, size = [], 0
+        size += len(text) + (len(NOTIFY_SEPARATOR) if current else 0)
+        current.append(text)
+    if current:
+        groups.append(current)
+    return groups
+
+
 class MetaService:
     """Handles WhatsApp and Instagram messaging via Meta APIs."""
     
@@ -50,58 +197,134 @@ class MetaService:
         self.ig_account_id = settings.META_INSTAGRAM_ACCOUNT_ID
         self.wa_url = f"https://graph.facebook.com/v18.0/{self.wa_phone_id}/messages"
         self.ig_url = "https://graph.facebook.com/v18.0/me/messages"
+        self._wa_headers = {"Authorization": f"Bearer {self.wa_token}", "Content-Type": "application/json"}
+        self._ig_headers = {"Authorization": f"Bearer {self.ig_token}", "Content-Type": "application/json"}
+        # Fail fast to Twilio (or an error) while Meta is having an outage
+        self._wa_breaker = MetaCircuitBreaker("Meta WhatsApp")
+        self._ig_breaker = MetaCircuitBreaker("Meta Instagram")
+        # Smooth outbound sends below Meta's per-number / per-app limits
+        self._wa_limiter = AsyncTokenBucket(60, 60)
+        self._ig_limiter = AsyncTokenBucket(30, 30)
+        self._http_client: Optional[httpx.AsyncClient] = None
+        # Media URLs are valid for ~5 min; cache slightly less than that
+        self._media_url_cache = TTLCache(maxsize=2048, ttl=240)
+        self._ig_media_cache = TTLCache(maxsize=512, ttl=240)
+        # In-flight Graph requests keyed by (kind, id) for single-flight coalescing
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self._read_queue: Optional[asyncio.Queue] = None
+        self._read_flusher: Optional[asyncio.Task] = None
+        self._notify_queues: dict[str, asyncio.Queue] = {}
+        self._notify_flushers: dict[str, asyncio.Task] = {}
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """
+        Shared keep-alive client so concurrent Graph calls reuse pooled connections.
+        
+        Normally created by startup() on the serving loop; created lazily here
+        for scripts and tests that never run the FastAPI lifespan.
+        """
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.AsyncClient(
+                timeout=30.0,
+                transport=cached_dns_transport(
+                    limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+                )
+            )
+        return self._http_client
+
+    async def startup(self):
+        """Create the shared client on the running (serving) event loop. Called from app lifespan."""
+        _ = self.http
+
+    async def aclose(self):
+        """Stop the background flushers and close pooled connections. Called on shutdown."""
+        # Flushers send what they still hold before exiting
+        flushers = [t for t in (self._read_flusher, *self._notify_flushers.values()) if t and not t.done()]
+        for task in flushers:
+            task.cancel()
+        await asyncio.gather(*flushers, return_exceptions=True)
+        if self._http_client and not self._http_client.is_closed:
+            await self._http_client.aclose()
+        self._http_client = None
+
+    async def _single_flight(self, key: tuple, fetch: Callable[[], Awaitable[Any]]):
+        """
+        Collapse concurrent identical Graph requests into one network call.
+        
+        Duplicate webhook deliveries can ask for the same media / receipt at the
+        same time; followers await the leader's result instead of re-fetching.
+        """
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        result = None
+        try:
+            result = await fetch()
+            return result
+        finally:
+            del self._inflight[key]
+            future.set_result(result)
 
     async def send_whatsapp_text(self, to_phone: str, text: str):
         """Send text message via WhatsApp. Falls back to Twilio if Meta fails."""
         if self.wa_token and self.wa_phone_id:
             # Try Meta API with retry
-            result = await self._send_whatsapp_with_retry(to_phone, text)
+            payload = {"messaging_product": "whatsapp", "to": to_phone, "type": "text", "text": {"body": text}}
+            result = await self._send_whatsapp_with_retry(payload)
             if result:
                 return result
 
         # Twilio fallback (if Meta fails completely)
         return await self._send_twilio_fallback(to_phone, text)
     
-    async def _send_whatsapp_with_retry(self, to_phone: str, text: str, max_retries: int = 3):
-        """Internal method with retry logic for Meta WhatsApp API."""
-        last_error = None
-        for attempt in range(max_retries):
-            try:
-                headers = {"Authorization": f"Bearer {self.wa_token}", "Content-Type": "application/json"}
-                payload = {"messaging_product": "whatsapp", "to": to_phone, "type": "text", "text": {"body": text}}
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    response = await client.post(self.wa_url, headers=headers, json=payload)
-                    response.raise_for_status()
-                    return {"status": "sent_via_meta", "provider": "meta", "response": response.json()}
-            except (httpx.HTTPStatusError, httpx.TimeoutException, httpx.ConnectError) as e:
-                last_error = e
-                if attempt < max_retries - 1:
-                    delay = min(1.0 * (2 ** attempt), 10.0)  # Exponential backoff
-                    logger.warning(f"WhatsApp send retry {attempt + 1}/{max_retries} after {delay}s: {e}")
-                    await asyncio.sleep(delay)
-                else:
-                    logger.error(f"WhatsApp send failed after {max_retries} attempts: {e}")
-            except Exception as e:
-                logger.error(f"Meta WhatsApp unexpected error: {e}")
-                return None
-        return None
+    async def _send_whatsapp_with_retry(self, payload: dict):
+        """Send a WhatsApp payload via Meta, guarded by the circuit breaker and rate limiter."""
+        if not self._wa_breaker.allow_request():
+            logger.warning("Meta WhatsApp circuit open, skipping to fallback")
+            return None
+
+        try:
+            await self._wa_limiter.acquire()
+            data = await self._post_wa(payload)
+            self._wa_breaker.record_success()
+        except Exception as e:
+            logger.error(f"Meta WhatsApp send failed: {e}")
+            self._wa_breaker.record_error(e)
+            return None
+        finally:
+            self._wa_breaker.release_probe()
+        return {"status": "sent_via_meta", "provider": "meta", "response": data}
+
+    @async_retry(max_attempts=3)
+    async def _post_wa(self, payload: dict) -> dict:
+        """POST a prebuilt payload to the WhatsApp messages endpoint (retried with backoff)."""
+        response = await self.http.post(self.wa_url, headers=self._wa_headers, json=payload)
+        response.raise_for_status()
+        return response.json()
     
     async def _send_twilio_fallback(self, to_phone: str, text: str):
 
         # Twilio fallback
-        if settings.TWILIO_ACCOUNT_SID and settings.TWILIO_AUTH_TOKEN and settings.TWILIO_PHONE_NUMBER:
+        sid = settings.TWILIO_ACCOUNT_SID
+        if sid and settings.TWILIO_AUTH_TOKEN and settings.TWILIO_PHONE_NUMBER:
             try:
-                from twilio.rest import Client
-                client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
                 from_num = settings.TWILIO_PHONE_NUMBER
                 if not from_num.startswith("whatsapp:"):
                     from_num = f"whatsapp:{from_num}"
-                clean_to = to_phone.strip()
-                if clean_to.startswith("0") and len(clean_to) == 11:
-                    clean_to = "+234" + clean_to[1:]
+                clean_to = _to_e164(to_phone)
                 to_num = f"whatsapp:{clean_to}" if not clean_to.startswith("whatsapp:") else clean_to
-                message = client.messages.create(body=text, from_=from_num, to=to_num)
-                return {"status": "sent_via_twilio", "provider": "twilio", "sid": message.sid}
+                # Plain REST call over the shared async client (the Twilio SDK is blocking)
+                response = await self.http.post(
+                    TWILIO_MESSAGES_URL.format(sid=sid),
+                    auth=(sid, settings.TWILIO_AUTH_TOKEN),
+                    data={"From": from_num, "To": to_num, "Body": text}
+                )
+                response.raise_for_status()
+                return {"status": "sent_via_twilio", "provider": "twilio", "sid": response.json().get("sid")}
             except Exception as e:
                 logger.error(f"Twilio Fallback failed: {e}")
                 return {"status": "error", "provider": "twilio", "error": str(e)}
@@ -112,33 +335,68 @@ class MetaService:
         """Send Instagram DM."""
         if not self.ig_token:
             return {"status": "error", "provider": "instagram", "error": "Missing credentials"}
+        if not self._ig_breaker.allow_request():
+            return {"status": "error", "provider": "instagram", "error": "Instagram API unavailable (circuit open)"}
 
-        headers = {"Authorization": f"Bearer {self.ig_token}", "Content-Type": "application/json"}
         payload = {"recipient": {"id": to_id}, "message": {"text": text}}
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(self.ig_url, headers=headers, json=payload)
-                response.raise_for_status()
-                return {"status": "sent_via_instagram", "provider": "instagram", "response": response.json()}
-            except Exception as e:
-                logger.error(f"Instagram send error: {e}")
-                return {"status": "error", "provider": "instagram", "error": str(e)}
+        try:
+            await self._ig_limiter.acquire()
+            response = await self.http.post(self.ig_url, headers=self._ig_headers, json=payload)
+            response.raise_for_status()
+            self._ig_breaker.record_success()
+            return {"status": "sent_via_instagram", "provider": "instagram", "response": response.json()}
+        except Exception as e:
+            logger.error(f"Instagram send error: {e}")
+            self._ig_breaker.record_error(e)
+            return {"status": "error", "provider": "instagram", "error": str(e)}
+        finally:
+            self._ig_breaker.release_probe()
 
     async def get_media_url(self, media_id: str) -> str:
         """Retrieve media URL from Graph API."""
         if not self.wa_token:
             return None
+        cached = self._media_url_cache.get(media_id)
+        if cached:
+            return cached
+        return await self._single_flight(("media", media_id), lambda: self._fetch_media_url(media_id))
+
+    async def _fetch_media_url(self, media_id: str) -> Optional[str]:
         url = f"https://graph.facebook.com/v18.0/{media_id}"
         headers = {"Authorization": f"Bearer {self.wa_token}"}
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(url, headers=headers)
+        try:
+            response = await self.http.get(url, headers=headers)
+            response.raise_for_status()
+            media_url = response.json().get("url")
+            if media_url:
+                self._media_url_cache.set(media_id, media_url)
+            return media_url
+        except Exception as e:
+            logger.error(f"Failed to get media URL: {e}")
+            return None
+
+    async def download_media(self, media_id: str) -> Optional[bytes]:
+        """
+        Download WhatsApp media bytes (media id -> URL -> content).
+        
+        Streams the body into a single bytearray instead of letting httpx
+        buffer it in `response.content`, keeping peak memory to ~1 copy.
+        """
+        media_url = await self.get_media_url(media_id)
+        if not media_url:
+            return None
+        headers = {"Authorization": f"Bearer {self.wa_token}"}
+        try:
+            async with self.http.stream("GET", media_url, headers=headers) as response:
                 response.raise_for_status()
-                return response.json().get("url")
-            except Exception as e:
-                logger.error(f"Failed to get media URL: {e}")
-                return None
+                buf = bytearray()
+                async for chunk in response.aiter_bytes(65536):
+                    buf.extend(chunk)
+                return bytes(buf)
+        except Exception as e:
+            logger.error(f"Failed to download media {media_id}: {e}")
+            return None
 
     async def get_instagram_posts(self, limit: int = 10):
         """Fetch recent Instagram posts."""
@@ -146,14 +404,33 @@ class MetaService:
             return []
         url = f"https://graph.facebook.com/v18.0/{self.ig_account_id}/media"
         params = {"fields": "id,caption,media_type,media_url,permalink,timestamp,like_count", "limit": limit, "access_token": self.ig_token}
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(url, params=params)
-                response.raise_for_status()
-                return response.json().get("data", [])
-            except Exception as e:
-                logger.error(f"Failed to fetch IG posts: {e}")
-                return []
+        try:
+            response = await self.http.get(url, params=params)
+            response.raise_for_status()
+            return response.json().get("data", [])
+        except Exception as e:
+            logger.error(f"Failed to fetch IG posts: {e}")
+            return []
+
+    async def get_instagram_posts_with_details(self, limit: int = 10) -> list:
+        """
+        Fetch recent Instagram posts and their media details concurrently.
+        
+        Detail lookups run in parallel over the shared connection pool, so N posts
+        cost roughly one extra round-trip instead of N. Posts whose detail lookup
+        fails keep their list-endpoint fields.
+        """
+        posts = await self.get_instagram_posts(limit)
+        if not posts:
+            return []
+        details = await asyncio.gather(
+            *(self.get_instagram_media(p.get("id")) for p in posts),
+            return_exceptions=True
+        )
+        return [
+            {**post, **detail} if isinstance(detail, dict) else post
+            for post, detail in zip(posts, details)
+        ]
 
     async def get_instagram_media(self, media_id: str) -> Optional[dict]:
         """
@@ -164,36 +441,164 @@ class MetaService:
         """
         if not self.ig_token or not media_id:
             return None
-        
+        cached = self._ig_media_cache.get(media_id)
+        if cached:
+            return cached
+        return await self._single_flight(("ig_media", media_id), lambda: self._fetch_instagram_media(media_id))
+
+    async def _fetch_instagram_media(self, media_id: str) -> Optional[dict]:
         url = f"https://graph.facebook.com/v18.0/{media_id}"
         params = {
             "fields": "id,caption,media_type,media_url,permalink,timestamp",
             "access_token": self.ig_token
         }
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(url, params=params)
-                response.raise_for_status()
-                data = response.json()
-                logger.info(f"Fetched Instagram media {media_id}: {data.get('media_type')}")
-                return data
-            except Exception as e:
-                logger.error(f"Failed to fetch Instagram media {media_id}: {e}")
-                return None
+        try:
+            response = await self.http.get(url, params=params)
+            response.raise_for_status()
+            data = response.json()
+            logger.info(f"Fetched Instagram media {media_id}: {data.get('media_type')}")
+            self._ig_media_cache.set(media_id, data)
+            return data
+        except Exception as e:
+            logger.error(f"Failed to fetch Instagram media {media_id}: {e}")
+            return None
 
-    async def mark_whatsapp_message_read(self, message_id: str):
-        """Mark message as read for instant feedback."""
+    def mark_whatsapp_message_read(self, message_id: str):
+        """
+        Mark message as read for instant feedback.
+        
+        Fire-and-forget: ids are queued and a background task flushes them to
+        Meta in Graph batch requests, so callers never wait on the receipt.
+        """
         if not self.wa_token or not self.wa_phone_id or not message_id:
             return
-        url = f"https://graph.facebook.com/v18.0/{self.wa_phone_id}/messages"
-        headers = {"Authorization": f"Bearer {self.wa_token}", "Content-Type": "application/json"}
-        payload = {"messaging_product": "whatsapp", "status": "read", "message_id": message_id}
-        async with httpx.AsyncClient() as client:
+        if self._read_flusher is None or self._read_flusher.done():
+            # Reuse the queue so ids re-queued by a cancelled flusher go out with the next batch
+            if self._read_queue is None:
+                self._read_queue = asyncio.Queue()
+            self._read_flusher = asyncio.create_task(self._flush_read_queue())
+        self._read_queue.put_nowait(message_id)
+
+    async def _flush_read_queue(self):
+        """Drain queued read receipts: up to READ_BATCH_SIZE ids or READ_BATCH_WINDOW seconds per POST."""
+        loop = asyncio.get_running_loop()
+        batch = []
+        try:
+            while True:
+                batch = [await self._read_queue.get()]
+                deadline = loop.time() + READ_BATCH_WINDOW
+                while len(batch) < READ_BATCH_SIZE:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._read_queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                # Ids stay in `batch` until the POST returns, so a cancel mid-flight keeps them
+                await self._post_read_receipts(batch)
+                batch = []
+        except asyncio.CancelledError:
+            # Shutdown: send whatever is held or still queued
+            while not self._read_queue.empty():
+                batch.append(self._read_queue.get_nowait())
+            while batch:
+                await self._post_read_receipts(batch[:READ_BATCH_SIZE])
+                del batch[:READ_BATCH_SIZE]
+            raise
+        finally:
+            # Interrupted before these were sent: put them back for the next flusher
+            for message_id in batch:
+                self._read_queue.put_nowait(message_id)
+
+    async def _post_read_receipts(self, message_ids: list):
+        """Send read receipts as sub-requests of a single Graph batch POST."""
+        message_ids = list(dict.fromkeys(message_ids))  # drop duplicate deliveries
+        batch = [
+            {
+                "method": "POST",
+                "relative_url": f"{self.wa_phone_id}/messages",
+                "body": urlencode({"messaging_product": "whatsapp", "status": "read", "message_id": message_id})
+            }
+            for message_id in message_ids
+        ]
+        headers = {"Authorization": f"Bearer {self.wa_token}"}
+        try:
+            response = await self.http.post(GRAPH_API_URL, headers=headers, data={"batch": json.dumps(batch)})
+            response.raise_for_status()
+            results = response.json()
+        except Exception as e:
+            logger.warning(f"Failed to mark {len(batch)} message(s) read: {e}")
+            return
+        # Each sub-request succeeds or fails on its own (null = not executed)
+        for message_id, result in zip(message_ids, results):
+            code = result.get("code") if isinstance(result, dict) else None
+            if code != 200:
+                body = result.get("body") if isinstance(result, dict) else None
+                logger.warning(f"Failed to mark message {message_id} read: {code} {body}")
+
+    def queue_whatsapp_text(self, to_phone: str, text: str):
+        """
+        Fire-and-forget text send for notifications (e.g. admin alerts).
+        
+        Messages queued for the same number within NOTIFY_BATCH_WINDOW are
+        joined and sent as one WhatsApp message by a per-number flusher.
+        """
+        queue = self._notify_queues.get(to_phone)
+        if queue is None:
+            queue = self._notify_queues[to_phone] = asyncio.Queue()
+        flusher = self._notify_flushers.get(to_phone)
+        if flusher is None or flusher.done():
+            self._notify_flushers[to_phone] = asyncio.create_task(self._flush_notify_queue(to_phone, queue))
+        queue.put_nowait(text)
+
+    async def _flush_notify_queue(self, to_phone: str, queue: asyncio.Queue):
+        """Drain one number's notifications: up to NOTIFY_BATCH_SIZE or NOTIFY_BATCH_WINDOW seconds per send."""
+        loop = asyncio.get_running_loop()
+        batch = []
+        try:
+            while True:
+                batch = [await queue.get()]
+                deadline = loop.time() + NOTIFY_BATCH_WINDOW
+                while len(batch) < NOTIFY_BATCH_SIZE:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                texts, batch = batch, []
+                await self._send_notification_batch(to_phone, texts)
+        except asyncio.CancelledError:
+            # Shutdown: deliver whatever is held or still queued
+            while not queue.empty():
+                batch.append(queue.get_nowait())
+            if batch:
+                await self._send_notification_batch(to_phone, batch)
+            raise
+
+    async def _send_notification_batch(self, to_phone: str, texts: list):
+        """Send queued notifications joined into bodies under WA_TEXT_LIMIT; a failed body is resent message by message."""
+        for group in _pack_notifications(texts):
+            if await self._send_notification(to_phone, NOTIFY_SEPARATOR.join(group)) or len(group) == 1:
+                continue
+            for text in group:
+                await self._send_notification(to_phone, text)
+
+    async def _send_notification(self, to_phone: str, text: str) -> bool:
+        """Send one notification, splitting bodies over WA_TEXT_LIMIT. Returns False if any part failed."""
+        ok = True
+        for start in range(0, len(text), WA_TEXT_LIMIT):
             try:
-                await client.post(url, headers=headers, json=payload)
+                result = await self.send_whatsapp_text(to_phone, text[start:start + WA_TEXT_LIMIT])
             except Exception as e:
-                logger.warning(f"Failed to mark message read: {e}")
+                result = {"status": "error", "error": str(e)}
+            if not result or result.get("status") == "error":
+                logger.error(f"Failed to send notification to {to_phone}: {(result or {}).get('error')}")
+                ok = False
+        return ok
 
     async def send_typing_indicator(self, to_phone: str):
         """Placeholder: WhatsApp Cloud API doesn't support typing indicators."""
@@ -204,26 +609,26 @@ class MetaService:
         if not self.wa_token or not self.wa_phone_id:
             return {"status": "error", "error": "Missing credentials"}
         
-        buttons = buttons[:3]
-        headers = {"Authorization": f"Bearer {self.wa_token}", "Content-Type": "application/json"}
-        payload = {
-            "messaging_product": "whatsapp",
-            "to": to_phone,
-            "type": "interactive",
-            "interactive": {
-                "type": "button",
-                "body": {"text": body_text},
-                "action": {"buttons": [{"type": "reply", "reply": {"id": b["id"], "title": b["title"][:20]}} for b in buttons]}
-            }
-        }
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(self.wa_url, headers=headers, json=payload)
-                response.raise_for_status()
-                return {"status": "sent", "response": response.json()}
-            except Exception as e:
-                logger.error(f"WhatsApp buttons failed: {e}")
-                return {"status": "error", "error": str(e)}
+        await self._wa_limiter.acquire()
+        button_json = ",".join(
+            BUTTON_JSON % (json.dumps(b["id"]), json.dumps(b["title"][:20])) for b in buttons[:3]
+        )
+        content = BUTTONS_PAYLOAD_JSON % (json.dumps(to_phone), json.dumps(body_text), button_json)
+        try:
+            response = await self.http.post(self.wa_url, headers=self._wa_headers, content=content.encode())
+            response.raise_for_status()
+            return {"status": "sent", "response": response.json()}
+        except Exception as e:
+            logger.error(f"WhatsApp buttons failed: {e}")
+            return {"status": "error", "error": str(e)}
+
+@lru_cache(maxsize=1)
+def get_meta_service() -> MetaService:
+    """
+    Per-worker MetaService singleton.
+    Connections, circuit breakers and rate limiters are shared by every request in the worker.
+    """
+    return MetaService()
 
 
-meta_service = MetaService()
+meta_service = get_meta_service()
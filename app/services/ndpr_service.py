@@ -5,16 +5,41 @@ Per NDPR "Right to be Forgotten":
 - DELETE: User memory (Pinecone), Message logs (PostgreSQL)
 - RETAIN: Orders, Incidents, Feedback (legal/T&S basis)
 """
+import asyncio
 from app.services.db_service import AsyncSessionLocal
+from app.utils.config import settings
 from sqlalchemy import text
 import logging
 
+try:
+    from pinecone import Pinecone
+except ImportError:
+    Pinecone = None
+
 logger = logging.getLogger(__name__)
 
+DELETE_BATCH_SIZE = 10_000
+
+# Uses idx_message_logs_user (see auto_migration) for each batch
+DELETE_MESSAGE_LOGS_BATCH = text("""
+    WITH to_delete AS (
+        SELECT id FROM message_logs
+        WHERE user_id = :user_id
+        ORDER BY id
+        LIMIT :batch
+    )
+    DELETE FROM message_logs USING to_delete
+    WHERE message_logs.id = to_delete.id
+""")
+
 
 class NDPRService:
     """Handles NDPR-compliant data deletion requests."""
     
+    def __init__(self):
+        self._pc_index = None
+        self._pc_lock = asyncio.Lock()
+    
     async def delete_user_memory(self, user_id: str) -> dict:
         """
         Delete user's personalized data (Right to be Forgotten).
@@ -38,43 +63,25 @@ class NDPRService:
             "message": ""
         }
         
-        # 1. Delete from Pinecone (user memory vectors)
-        try:
-            from app.utils.config import settings
-            if settings.PINECONE_API_KEY and settings.PINECONE_INDEX_USER_MEMORY:
-                from pinecone import Pinecone
-                pc = Pinecone(api_key=settings.PINECONE_API_KEY)
-                index = pc.Index(settings.PINECONE_INDEX_USER_MEMORY)
-                
-                # Delete all vectors with user_id metadata
-                # Pinecone delete by metadata filter
-                delete_response = index.delete(
-                    filter={"user_id": {"$eq": user_id}}
-                )
-                result["deleted"]["pinecone_vectors"] = "all matching"
-                logger.info(f"Deleted Pinecone vectors for user {user_id}")
-            else:
-                logger.warning("Pinecone not configured, skipping vector deletion")
-                
-        except Exception as e:
-            logger.error(f"Pinecone deletion error for {user_id}: {e}")
-            result["deleted"]["pinecone_vectors"] = f"error: {str(e)}"
+        # Pinecone and PostgreSQL deletions are independent; run them concurrently
+        pinecone_result, logs_result = await asyncio.gather(
+            self._delete_pinecone(user_id),
+            self._delete_message_logs(user_id),
+            return_exceptions=True
+        )
         
-        # 2. Delete from PostgreSQL message_logs
-        try:
-            async with AsyncSessionLocal() as session:
-                query = text("""
-                    DELETE FROM message_logs WHERE user_id = :user_id
-                """)
-                delete_result = await session.execute(query, {"user_id": user_id})
-                await session.commit()
-                result["deleted"]["message_logs"] = delete_result.rowcount
-                logger.info(f"Deleted {delete_result.rowcount} message logs for user {user_id}")
-                
-        except Exception as e:
-            logger.error(f"Message logs deletion error for {user_id}: {e}")
-            result["deleted"]["message_logs"] = f"error: {str(e)}"
+        if isinstance(pinecone_result, Exception):
+            logger.error(f"Pinecone deletion error for {user_id}: {pinecone_result}")
+            result["deleted"]["pinecone_vectors"] = f"error: {str(pinecone_result)}"
+        else:
+            result["deleted"]["pinecone_vectors"] = pinecone_result
+        
+        if isinstance(logs_result, Exception):
+            logger.error(f"Message logs deletion error for {user_id}: {logs_result}")
+            result["deleted"]["message_logs"] = f"error: {str(logs_result)}"
             result["success"] = False
+        else:
+            result["deleted"]["message_logs"] = logs_result
         
         # Build confirmation message
         if result["success"]:
@@ -95,6 +102,49 @@ class NDPRService:
         
         return result
 
+    
+    async def _get_memory_index(self):
+        """Build the Pinecone user_memory index handle once and reuse it (keeps its connection pool warm)."""
+        if self._pc_index is None:
+            async with self._pc_lock:
+                if self._pc_index is None:
+                    def _connect():
+                        pc = Pinecone(api_key=settings.PINECONE_API_KEY)
+                        return pc.Index(settings.PINECONE_INDEX_USER_MEMORY)
+                    self._pc_index = await asyncio.to_thread(_connect)
+        return self._pc_index
+    
+    async def _delete_pinecone(self, user_id: str):
+        """Delete all user_memory vectors tagged with this user_id."""
+        if Pinecone is None or not (settings.PINECONE_API_KEY and settings.PINECONE_INDEX_USER_MEMORY):
+            logger.warning("Pinecone not configured, skipping vector deletion")
+            return 0
+        
+        index = await self._get_memory_index()
+        
+        # Pinecone delete by metadata filter (sync SDK, keep it off the event loop)
+        await asyncio.to_thread(index.delete, filter={"user_id": {"$eq": user_id}})
+        logger.info(f"Deleted Pinecone vectors for user {user_id}")
+        return "all matching"
+    
+    async def _delete_message_logs(self, user_id: str) -> int:
+        """
+        Delete the user's message_logs rows.
+        Bounded batches (committed one by one) keep locks and WAL per statement small.
+        """
+        deleted = 0
+        async with AsyncSessionLocal() as session:
+            while True:
+                delete_result = await session.execute(
+                    DELETE_MESSAGE_LOGS_BATCH, {"user_id": user_id, "batch": DELETE_BATCH_SIZE}
+                )
+                await session.commit()
+                deleted += delete_result.rowcount
+                if delete_result.rowcount < DELETE_BATCH_SIZE:
+                    break
+        logger.info(f"Deleted {deleted} message logs for user {user_id}")
+        return deleted
+
 
 # Singleton instance
 ndpr_service = NDPRService()
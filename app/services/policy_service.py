@@ -3,10 +3,14 @@ Policy Service: File-based RAG for business policies.
 
 Loads policies from docs/policies/*.md and retrieves relevant ones based on keywords.
 """
+import heapq
 import os
 import re
 import logging
-from typing import Dict, List, Optional, Tuple
+import threading
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Tuple
+from functools import lru_cache
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -54,40 +58,137 @@ POLICY_KEYWORDS = {
     }
 }
 
+# Summary sizes precomputed at load: supervisor store info (5), prompt context (15), default (20)
+SUMMARY_SIZES = (5, 15, 20)
+# Assembled contexts kept per PolicyService, keyed by (keyword signature, max_chars)
+CONTEXT_CACHE_SIZE = 2048
+
+# POLICY_KEYWORDS flattened into parallel tuples indexed by policy position;
+# the index doubles as the tie-break (ties keep POLICY_KEYWORDS order)
+_POLICY_NAMES: Tuple[str, ...] = tuple(POLICY_KEYWORDS)
+_POLICY_KEYWORDS: Tuple[Tuple[str, ...], ...] = tuple(tuple(c["keywords"]) for c in POLICY_KEYWORDS.values())
+_POLICY_PRIORITY_WEIGHT: Tuple[int, ...] = tuple(10 - c.get("priority", 5) for c in POLICY_KEYWORDS.values())
+
+
+def _build_keyword_matcher() -> Tuple["re.Pattern", Dict[str, Tuple[str, ...]], Dict[str, Tuple[Tuple[int, int], ...]]]:
+    """
+    Compile every POLICY_KEYWORDS entry into one alternation so a query is
+    scanned in a single pass instead of one `in` check per keyword.
+    
+    Returns (pattern, implied, weights):
+    - implied maps a matched keyword to every keyword it stands for, including
+      shorter ones it contains (e.g. "help me with" also counts "help", and
+      "consultation" also counts "consult"), since the regex only reports the
+      longest match at each position.
+    - weights maps a keyword to its (policy_index, weight) pairs, where weight is
+      the keyword's word count times the policy priority factor.
+    """
+    pairs: Dict[str, List[Tuple[int, int]]] = {}
+    for index, (keywords, factor) in enumerate(zip(_POLICY_KEYWORDS, _POLICY_PRIORITY_WEIGHT)):
+        for keyword in keywords:
+            pairs.setdefault(keyword, []).append((index, len(keyword.split()) * factor))
+    weights = {keyword: tuple(p) for keyword, p in pairs.items()}
+
+    implied = {
+        keyword: tuple(k for k in weights if re.search(rf"\b{re.escape(k)}", keyword))
+        for keyword in weights
+    }
+
+    # Single words must start a token but may be inflected ("refund" matches
+    # "refunds", "refunded"; "fee" doesn't match "coffee"); phrases match
+    # anywhere. Longest first.
+    alternatives = [
+        re.escape(k) if " " in k else rf"\b{re.escape(k)}"
+        for k in sorted(weights, key=len, reverse=True)
+    ]
+    return re.compile("|".join(alternatives)), implied, weights
+
+
+@dataclass(frozen=True)
+class LoadedPolicy:
+    """A policy file decoded once, with its lines split once for summaries."""
+    name: str
+    content: str
+    lines: Tuple[str, ...]
+
+
+def _build_summary(lines: Tuple[str, ...], max_lines: int) -> str:
+    """First max_lines non-empty lines of a policy, prioritizing headers and bullet points."""
+    summary_lines = []
+    for line in lines[:max_lines * 2]:  # Look ahead a bit
+        if line.strip():
+            # Prioritize headers and bullet points
+            if line.startswith("#") or line.startswith("-") or line.startswith("*"):
+                summary_lines.append(line)
+            elif len(summary_lines) < max_lines:
+                summary_lines.append(line)
+        
+        if len(summary_lines) >= max_lines:
+            break
+    
+    return "\n".join(summary_lines)
+
 
 class PolicyService:
     """
     Service for loading and retrieving business policies.
+    
+    Loads build fresh dicts under a lock and swap them in, so concurrent
+    readers (threadpool or event loop) never see a half-loaded state.
     """
     
     def __init__(self):
         self.policies: Dict[str, str] = {}
+        self._documents: Dict[str, LoadedPolicy] = {}
+        self._summaries: Dict[Tuple[str, int], str] = {}
         self.loaded = False
+        self._load_lock = threading.Lock()
+        self._keyword_pattern, self._implied_keywords, self._keyword_weights = _build_keyword_matcher()
+        # Per-instance memo of assembled contexts, cleared whenever policies are (re)loaded
+        self._build_context = lru_cache(maxsize=CONTEXT_CACHE_SIZE)(self._assemble_context)
+        # Policies are a handful of small files: load eagerly so lookups never hit disk
+        self.load_policies()
+    
+    def reload(self) -> None:
+        """Re-scan the policies directory (e.g. after editing policy files in development)."""
+        self._load(force=True)
     
     def load_policies(self) -> None:
-        """Load all policy files from disk."""
-        if self.loaded:
-            return
+        """Load all policy files from disk (no-op once loaded; use reload() to re-scan)."""
+        self._load(force=False)
+    
+    def _load(self, force: bool) -> None:
+        with self._load_lock:
+            if self.loaded and not force:
+                return
             
-        if not POLICIES_DIR.exists():
-            logger.warning(f"Policies directory not found: {POLICIES_DIR}")
-            return
-        
-        for policy_file in POLICIES_DIR.glob("*.md"):
-            policy_name = policy_file.stem
-            try:
-                content = policy_file.read_text(encoding="utf-8")
-                self.policies[policy_name] = content
-                logger.info(f"Loaded policy: {policy_name}")
-            except Exception as e:
-                logger.error(f"Failed to load policy {policy_name}: {e}")
-        
-        self.loaded = True
-        logger.info(f"Loaded {len(self.policies)} policies")
+            if not POLICIES_DIR.exists():
+                logger.warning(f"Policies directory not found: {POLICIES_DIR}")
+                return
+            
+            documents: Dict[str, LoadedPolicy] = {}
+            summaries: Dict[Tuple[str, int], str] = {}
+            for policy_file in POLICIES_DIR.glob("*.md"):
+                policy_name = policy_file.stem
+                try:
+                    content = policy_file.read_bytes().decode("utf-8")
+                    policy = LoadedPolicy(policy_name, content, tuple(content.split("\n")))
+                    documents[policy_name] = policy
+                    for max_lines in SUMMARY_SIZES:
+                        summaries[(policy_name, max_lines)] = _build_summary(policy.lines, max_lines)
+                    logger.info(f"Loaded policy: {policy_name}")
+                except Exception as e:
+                    logger.error(f"Failed to load policy {policy_name}: {e}")
+            
+            self._documents = documents
+            self._summaries = summaries
+            self.policies = {name: policy.content for name, policy in documents.items()}
+            self.loaded = True
+            self._build_context.cache_clear()
+            logger.info(f"Loaded {len(self.policies)} policies")
     
     def get_policy(self, name: str) -> Optional[str]:
         """Get a specific policy by name."""
-        self.load_policies()
         return self.policies.get(name)
     
     def search_policies(self, query: str, max_results: int = 2) -> List[Tuple[str, str]]:
@@ -101,36 +202,35 @@ class PolicyService:
         Returns:
             List of (policy_name, policy_content) tuples, sorted by relevance
         """
-        self.load_policies()
-        
         if not self.policies:
             return []
         
-        query_lower = query.lower()
-        scores: Dict[str, int] = {}
-        
-        # Score each policy based on keyword matches
-        for policy_name, config in POLICY_KEYWORDS.items():
-            keywords = config["keywords"]
-            priority = config.get("priority", 5)
-            
-            score = 0
-            for keyword in keywords:
-                if keyword in query_lower:
-                    # Longer keyword matches get higher scores
-                    score += len(keyword.split())
-            
-            if score > 0:
-                # Apply priority (lower priority number = higher importance)
-                scores[policy_name] = score * (10 - priority)
+        return self._rank_policies(self._match_keywords(query), max_results)
+    
+    def _match_keywords(self, query: str) -> FrozenSet[str]:
+        """Return the set of policy keywords present in the query."""
+        matched = set()
+        for keyword in self._keyword_pattern.findall(query.lower()):
+            matched.update(self._implied_keywords[keyword])
+        return frozenset(matched)
+    
+    def _rank_policies(self, matched: FrozenSet[str], max_results: int) -> List[Tuple[str, str]]:
+        """Score policies from matched keywords and return the top results."""
+        # Longer keyword matches and higher-priority policies weigh more
+        scores = [0] * len(_POLICY_NAMES)
+        for keyword in matched:
+            for index, weight in self._keyword_weights[keyword]:
+                scores[index] += weight
         
-        # Sort by score and return top results
-        sorted_policies = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+        # Partial sort for the top results; nlargest is stable, so ties keep POLICY_KEYWORDS order
+        top_policies = heapq.nlargest(max_results, (i for i, score in enumerate(scores) if score), key=scores.__getitem__)
         
+        policies = self.policies
         results = []
-        for policy_name, score in sorted_policies[:max_results]:
-            if policy_name in self.policies:
-                results.append((policy_name, self.policies[policy_name]))
+        for index in top_policies:
+            policy_name = _POLICY_NAMES[index]
+            if policy_name in policies:
+                results.append((policy_name, policies[policy_name]))
         
         return results
     
@@ -138,27 +238,16 @@ class PolicyService:
         """
         Get a summarized version of a policy (first N lines).
         Useful for injecting into prompts without bloating.
-        """
-        content = self.get_policy(name)
-        if not content:
-            return None
         
-        lines = content.split("\n")
-        
-        # Take first max_lines, prioritizing headers and key points
-        summary_lines = []
-        for line in lines[:max_lines * 2]:  # Look ahead a bit
-            if line.strip():
-                # Prioritize headers and bullet points
-                if line.startswith("#") or line.startswith("-") or line.startswith("*"):
-                    summary_lines.append(line)
-                elif len(summary_lines) < max_lines:
-                    summary_lines.append(line)
-            
-            if len(summary_lines) >= max_lines:
-                break
-        
-        return "\n".join(summary_lines)
+        Common sizes are precomputed at load time; other sizes are built once and memoized.
+        """
+        summary = self._summaries.get((name, max_lines))
+        if summary is None:
+            policy = self._documents.get(name)
+            if not policy or not policy.content:
+                return None
+            summary = self._summaries.setdefault((name, max_lines), _build_summary(policy.lines, max_lines))
+        return summary
     
     def get_relevant_context(self, query: str, max_chars: int = 2000) -> str:
         """
@@ -171,7 +260,16 @@ class PolicyService:
         Returns:
             Combined policy context as a string
         """
-        results = self.search_policies(query, max_results=2)
+        # Queries matching the same keyword set get the same context, so cache on that
+        signature = self._match_keywords(query)
+        if not signature:
+            return ""
+        return self._build_context(signature, max_chars)
+    
+    def _assemble_context(self, signature: FrozenSet[str], max_chars: int) -> str:
+        """Assemble the policy context for a keyword signature (memoized as _build_context)."""
+        logger.debug(f"Policy context cache miss: {self._build_context.cache_info()}")
+        results = self._rank_policies(signature, max_results=2)
         
         if not results:
             return ""
@@ -1,40 +1,167 @@
 """
 Profile Service: Manages customer profiles with retention scoring.
 """
-from sqlalchemy import text
-from app.services.db_service import AsyncSessionLocal
+from sqlalchemy import Row, text
+from app.services.db_service import AsyncSessionLocal, exec_raw, exec_write
+from app.utils.ttl_cache import TTLCache
+import asyncio
 import logging
 from datetime import datetime, timedelta
-import json
+from typing import AsyncIterator, List, Optional
 
 logger = logging.getLogger(__name__)
 
+# Upsert pattern: atomic insert-or-get, prevents duplicate key errors
+_Q_UPSERT_PROFILE = text("""
+    INSERT INTO customer_profiles (user_id, last_interaction)
+    VALUES (:user_id, NOW())
+    ON CONFLICT (user_id) DO UPDATE SET
+        last_interaction = EXCLUDED.last_interaction
+    RETURNING *
+""")
+
+MESSAGE_BATCH_SIZE = 128
+MESSAGE_BATCH_WINDOW = 0.05
+
+# Batched upsert of queued message stats, one row per user: $1 = user_ids,
+# $2 = message counts, $3 = sentiment sums. The running average is folded in
+# exactly as if each message had been applied one at a time.
+_SQL_RECORD_MESSAGES = """
+    INSERT INTO customer_profiles (user_id, message_count, avg_sentiment, last_interaction)
+    SELECT b.user_id, b.n, b.sentiment_sum / b.n, NOW()
+    FROM unnest($1::text[], $2::int[], $3::float8[]) AS b(user_id, n, sentiment_sum)
+    ON CONFLICT (user_id) DO UPDATE SET
+        message_count = customer_profiles.message_count + EXCLUDED.message_count,
+        avg_sentiment = (customer_profiles.avg_sentiment * customer_profiles.message_count
+                         + EXCLUDED.avg_sentiment * EXCLUDED.message_count)
+                        / (customer_profiles.message_count + EXCLUDED.message_count),
+        last_interaction = NOW(),
+        updated_at = NOW()
+"""
+
+# preferred_categories[category] += 1 in SQL (no-op when category is NULL)
+_Q_RECORD_PURCHASE = text("""
+    INSERT INTO customer_profiles (user_id, total_purchases, order_count, preferred_categories, last_interaction)
+    VALUES (
+        :user_id, :amount, 1,
+        CASE WHEN CAST(:category AS TEXT) IS NULL THEN '{}'::jsonb
+             ELSE jsonb_build_object(CAST(:category AS TEXT), 1) END,
+        NOW()
+    )
+    ON CONFLICT (user_id) DO UPDATE SET
+        total_purchases = customer_profiles.total_purchases + :amount,
+        order_count = customer_profiles.order_count + 1,
+        preferred_categories = CASE WHEN CAST(:category AS TEXT) IS NULL THEN customer_profiles.preferred_categories
+            ELSE jsonb_set(
+                COALESCE(customer_profiles.preferred_categories, '{}'::jsonb),
+                ARRAY[CAST(:category AS TEXT)],
+                to_jsonb(COALESCE((customer_profiles.preferred_categories ->> CAST(:category AS TEXT))::int, 0) + 1)
+            ) END,
+        last_interaction = NOW(),
+        updated_at = NOW()
+""")
+
+# Weighted RFM retention, computed and stored in one statement:
+# - Recency: whole days since last interaction, decaying over 30 days (0.5 if unknown)
+# - Frequency: message count, capped at 20 messages
+# - Sentiment: avg_sentiment (-1 to 1) normalized to 0-1
+# - Monetary: purchase value, capped at 100k
+# (GREATEST ignores NULLs, so unknown recency needs the explicit CASE)
+_SQL_RETENTION_SCORE = """
+    0.3 * CASE WHEN last_interaction IS NULL THEN 0.5
+               ELSE GREATEST(0, 1 - FLOOR(EXTRACT(EPOCH FROM NOW() - last_interaction) / 86400) / 30.0) END +
+    0.2 * LEAST(1.0, COALESCE(message_count, 0) / 20.0) +
+    0.2 * ((COALESCE(avg_sentiment, 0.0) + 1) / 2) +
+    0.3 * LEAST(1.0, COALESCE(total_purchases, 0.0) / 100000.0)
+"""
+
+_Q_UPDATE_RETENTION = text(f"""
+    UPDATE customer_profiles SET
+        retention_score = {_SQL_RETENTION_SCORE},
+        updated_at = NOW()
+    WHERE user_id = :user_id
+    RETURNING retention_score
+""")
+
+_Q_PROFILES_FOR_PERIOD = text("""
+    SELECT * FROM customer_profiles
+    WHERE last_interaction BETWEEN :start_date AND :end_date
+    ORDER BY total_purchases DESC
+""")
+
+_Q_LEAD_INPUTS = text("""
+    SELECT 
+        total_purchases, 
+        order_count, 
+        message_count,
+        last_interaction,
+        avg_sentiment
+    FROM customer_profiles 
+    WHERE user_id = :user_id
+""")
+
+_Q_SET_LEAD_SCORE = text("""
+    UPDATE customer_profiles 
+    SET lead_score = :score, updated_at = NOW()
+    WHERE user_id = :user_id
+""")
+
+_Q_HIGH_VALUE_LEADS = text("""
+    SELECT user_id, lead_score, total_purchases, order_count, last_interaction
+    FROM customer_profiles
+    WHERE lead_score >= :min_score
+    ORDER BY lead_score DESC
+    LIMIT 50
+""")
+
 
 class ProfileService:
     """Service for managing customer profiles and calculating retention scores."""
     
+    PROFILE_CACHE_TTL = 30     # Profile re-reads within a conversation burst
+    RETENTION_CACHE_TTL = 60   # Minimum interval between retention recomputes
+    
+    def __init__(self):
+        # Per-process memo keyed by user_id; profile entries are dropped on writes
+        self._profile_cache = TTLCache(maxsize=10_000, ttl=self.PROFILE_CACHE_TTL)
+        self._retention_cache = TTLCache(maxsize=10_000, ttl=self.RETENTION_CACHE_TTL)
+        # Write-behind queue of (user_id, sentiment) drained in batches by a background task
+        self._message_queue: Optional[asyncio.Queue] = None
+        self._message_flusher: Optional[asyncio.Task] = None
+    
+    async def aclose(self):
+        """Flush queued message stats and stop the flusher. Called on shutdown."""
+        if self._message_flusher and not self._message_flusher.done():
+            # The flusher writes the batch it holds (and the queue) before exiting
+            self._message_flusher.cancel()
+            await asyncio.gather(self._message_flusher, return_exceptions=True)
+        pending = []
+        while self._message_queue is not None and not self._message_queue.empty():
+            pending.append(self._message_queue.get_nowait())
+        if pending:
+            await self._write_message_batch(pending)
+    
     async def get_or_create_profile(self, user_id: str) -> dict:
         """
         Get existing profile or create a new one.
         
         Uses INSERT ON CONFLICT (upsert) pattern to prevent race conditions
         when multiple workers try to create the same profile simultaneously.
+        Served from a 30s in-process cache when the profile was just read.
         """
+        cached = self._profile_cache.get(user_id)
+        if cached is not None:
+            return dict(cached)
+        
         try:
-            async with AsyncSessionLocal() as session:
-                # Upsert pattern: atomic insert-or-get, prevents duplicate key errors
-                upsert_query = text("""
-                    INSERT INTO customer_profiles (user_id, last_interaction)
-                    VALUES (:user_id, NOW())
-                    ON CONFLICT (user_id) DO UPDATE SET
-                        last_interaction = EXCLUDED.last_interaction
-                    RETURNING *
-                """)
-                result = await session.execute(upsert_query, {"user_id": user_id})
-                await session.commit()
-                row = result.fetchone()
-                return dict(row._mapping) if row else {}
-                
+            result = await exec_write(_Q_UPSERT_PROFILE, {"user_id": user_id})
+            row = result.fetchone()
+            if not row:
+                return {}
+            profile = dict(row._mapping)
+            self._profile_cache.set(user_id, profile)
+            return dict(profile)
+            
         except Exception as e:
             logger.error(f"Failed to get/create profile: {e}")
             return {}
@@ -44,27 +171,63 @@ class ProfileService:
         user_id: str,
         sentiment_score: float = 0.0
     ):
-        """Update profile when user sends a message."""
+        """
+        Update profile when user sends a message.
+        
+        Write-behind: the update is queued and a background task upserts
+        queued messages in batches, so the message path never waits on the DB.
+        The cached profile is dropped once the batch is written.
+        """
+        if self._message_flusher is None or self._message_flusher.done():
+            self._message_queue = asyncio.Queue()
+            self._message_flusher = asyncio.create_task(self._flush_message_queue())
+        self._message_queue.put_nowait((user_id, float(sentiment_score or 0.0)))
+    
+    async def _flush_message_queue(self):
+        """Drain queued message stats: up to MESSAGE_BATCH_SIZE or MESSAGE_BATCH_WINDOW seconds per upsert."""
+        loop = asyncio.get_running_loop()
+        batch = []
         try:
-            async with AsyncSessionLocal() as session:
-                # Upsert: Update if exists, insert if not
-                query = text("""
-                    INSERT INTO customer_profiles (user_id, message_count, avg_sentiment, last_interaction)
-                    VALUES (:user_id, 1, :sentiment, NOW())
-                    ON CONFLICT (user_id) DO UPDATE SET
-                        message_count = customer_profiles.message_count + 1,
-                        avg_sentiment = (customer_profiles.avg_sentiment * customer_profiles.message_count + :sentiment) 
-                                        / (customer_profiles.message_count + 1),
-                        last_interaction = NOW(),
-                        updated_at = NOW()
-                """)
-                await session.execute(query, {
-                    "user_id": user_id,
-                    "sentiment": sentiment_score
-                })
-                await session.commit()
+            while True:
+                batch = [await self._message_queue.get()]
+                deadline = loop.time() + MESSAGE_BATCH_WINDOW
+                while len(batch) < MESSAGE_BATCH_SIZE:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._message_queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                updates, batch = batch, []
+                await self._write_message_batch(updates)
+        except asyncio.CancelledError:
+            # Shutdown: write whatever is held or still queued
+            while not self._message_queue.empty():
+                batch.append(self._message_queue.get_nowait())
+            if batch:
+                await self._write_message_batch(batch)
+            raise
+    
+    async def _write_message_batch(self, batch: list):
+        """Upsert a batch of (user_id, sentiment) pairs, aggregated per user."""
+        # ON CONFLICT can touch each row once per statement: fold repeats per user
+        totals = {}
+        for user_id, sentiment in batch:
+            count, sentiment_sum = totals.get(user_id, (0, 0.0))
+            totals[user_id] = (count + 1, sentiment_sum + sentiment)
+        try:
+            await exec_raw(
+                _SQL_RECORD_MESSAGES,
+                list(totals),
+                [count for count, _ in totals.values()],
+                [sentiment_sum for _, sentiment_sum in totals.values()],
+            )
         except Exception as e:
-            logger.error(f"Failed to update profile on message: {e}")
+            logger.error(f"Failed to update {len(totals)} profile(s) on message: {e}")
+        # Drop after the write so a read in between can't re-cache the old row
+        for user_id in totals:
+            self._profile_cache.pop(user_id)
     
     async def update_on_purchase(
         self,
@@ -75,120 +238,74 @@ class ProfileService:
         """
         Update profile when user makes a purchase.
         
-        Uses SELECT FOR UPDATE to prevent race conditions when multiple
-        purchases are processed in parallel for the same user.
+        Single atomic upsert: the category counter is incremented server-side,
+        so concurrent purchases for the same user can't overwrite each other.
+        The stored lead_score is refreshed afterwards so rankings can ORDER BY it.
         """
+        self._profile_cache.pop(user_id)
+        self._retention_cache.pop(user_id)
         try:
-            async with AsyncSessionLocal() as session:
-                # Acquire row lock before reading preferred_categories
-                # This prevents concurrent purchases from overwriting each other's category updates
-                get_query = text("""
-                    SELECT preferred_categories FROM customer_profiles 
-                    WHERE user_id = :user_id
-                    FOR UPDATE
-                """)
-                result = await session.execute(get_query, {"user_id": user_id})
-                row = result.fetchone()
-                
-                categories = {}
-                if row and row[0]:
-                    categories = row[0] if isinstance(row[0], dict) else json.loads(row[0])
-                
-                if category:
-                    categories[category] = categories.get(category, 0) + 1
-                
-                # Update profile (row is still locked from SELECT FOR UPDATE)
-                query = text("""
-                    INSERT INTO customer_profiles (user_id, total_purchases, order_count, preferred_categories, last_interaction)
-                    VALUES (:user_id, :amount, 1, :categories, NOW())
-                    ON CONFLICT (user_id) DO UPDATE SET
-                        total_purchases = customer_profiles.total_purchases + :amount,
-                        order_count = customer_profiles.order_count + 1,
-                        preferred_categories = :categories,
-                        last_interaction = NOW(),
-                        updated_at = NOW()
-                """)
-                await session.execute(query, {
-                    "user_id": user_id,
-                    "amount": amount,
-                    "categories": json.dumps(categories)
-                })
-                await session.commit()
+            await exec_write(_Q_RECORD_PURCHASE, {
+                "user_id": user_id,
+                "amount": amount,
+                "category": category
+            })
         except Exception as e:
             logger.error(f"Failed to update profile on purchase: {e}")
+            return
+        await self.compute_lead_score(user_id)
     
     async def calculate_retention_score(self, user_id: str) -> float:
         """
         Calculate retention score using RFM (Recency, Frequency, Monetary) model.
         
-        Returns: Score from 0.0 (likely to churn) to 1.0 (highly retained)
+        Returns: Score from 0.0 (likely to churn) to 1.0 (highly retained),
+        or 0.5 (neutral) when the user has no profile yet.
+        Recomputed at most once a minute per user (or after a purchase).
         """
+        cached = self._retention_cache.get(user_id)
+        if cached is not None:
+            return cached
+        
         try:
-            profile = await self.get_or_create_profile(user_id)
-            if not profile:
+            result = await exec_write(_Q_UPDATE_RETENTION, {"user_id": user_id})
+            row = result.fetchone()
+            if row is None:
                 return 0.5  # Default neutral
             
-            # Recency Score (days since last interaction)
-            last_interaction = profile.get('last_interaction')
-            if last_interaction:
-                days_ago = (datetime.now(last_interaction.tzinfo) - last_interaction).days
-                recency_score = max(0, 1 - (days_ago / 30))  # Decay over 30 days
-            else:
-                recency_score = 0.5
-            
-            # Frequency Score (message count, normalized)
-            message_count = profile.get('message_count', 0)
-            frequency_score = min(1.0, message_count / 20)  # Cap at 20 messages
-            
-            # Sentiment Score (already -1 to 1, normalize to 0-1)
-            avg_sentiment = profile.get('avg_sentiment', 0.0)
-            sentiment_normalized = (avg_sentiment + 1) / 2  # Convert to 0-1
-            
-            # Monetary Score (purchase value, normalized)
-            total_purchases = profile.get('total_purchases', 0.0)
-            monetary_score = min(1.0, total_purchases / 100000)  # Cap at 100k
-            
-            # Weighted RFM Score
-            retention = (
-                0.3 * recency_score +
-                0.2 * frequency_score +
-                0.2 * sentiment_normalized +
-                0.3 * monetary_score
-            )
-            
-            # Update the profile with the new retention score
-            async with AsyncSessionLocal() as session:
-                query = text("""
-                    UPDATE customer_profiles SET retention_score = :score, updated_at = NOW()
-                    WHERE user_id = :user_id
-                """)
-                await session.execute(query, {"user_id": user_id, "score": retention})
-                await session.commit()
-            
-            return round(retention, 2)
+            retention = round(row.retention_score, 2)
+            self._retention_cache.set(user_id, retention)
+            return retention
             
         except Exception as e:
             logger.error(f"Failed to calculate retention: {e}")
             return 0.5
     
+    async def iter_profiles_for_period(
+        self,
+        start_date: datetime,
+        end_date: datetime
+    ) -> AsyncIterator[Row]:
+        """
+        Stream customer profiles active in a period (server-side cursor, one row at a time).
+        Rows are yielded as-is (attribute access, e.g. row.user_id) without a dict copy.
+        """
+        async with AsyncSessionLocal() as session:
+            result = await session.stream(_Q_PROFILES_FOR_PERIOD, {
+                "start_date": start_date,
+                "end_date": end_date
+            })
+            async for row in result:
+                yield row
+    
     async def get_all_profiles_for_period(
         self,
         start_date: datetime,
         end_date: datetime
-    ) -> list:
+    ) -> List[Row]:
         """Get all customer profiles that were active in a period."""
         try:
-            async with AsyncSessionLocal() as session:
-                query = text("""
-                    SELECT * FROM customer_profiles
-                    WHERE last_interaction BETWEEN :start_date AND :end_date
-                    ORDER BY total_purchases DESC
-                """)
-                result = await session.execute(query, {
-                    "start_date": start_date,
-                    "end_date": end_date
-                })
-                return [dict(row._mapping) for row in result.fetchall()]
+            return [p async for p in self.iter_profiles_for_period(start_date, end_date)]
         except Exception as e:
             logger.error(f"Failed to get profiles for period: {e}")
             return []
@@ -206,17 +323,7 @@ class ProfileService:
         """
         try:
             async with AsyncSessionLocal() as session:
-                query = text("""
-                    SELECT 
-                        total_purchases, 
-                        order_count, 
-                        message_count,
-                        last_interaction,
-                        avg_sentiment
-                    FROM customer_profiles 
-                    WHERE user_id = :user_id
-                """)
-                result = await session.execute(query, {"user_id": user_id})
+                result = await session.execute(_Q_LEAD_INPUTS, {"user_id": user_id})
                 row = result.fetchone()
                 
                 if not row:
@@ -259,11 +366,7 @@ class ProfileService:
                 total_score = min(100, int(recency_score + frequency_score + monetary_score + sentiment_bonus))
                 
                 # Update score in database
-                await session.execute(text("""
-                    UPDATE customer_profiles 
-                    SET lead_score = :score, updated_at = NOW()
-                    WHERE user_id = :user_id
-                """), {"score": total_score, "user_id": user_id})
+                await session.execute(_Q_SET_LEAD_SCORE, {"score": total_score, "user_id": user_id})
                 await session.commit()
                 
                 logger.info(f"Lead score for {user_id}: {total_score} (R:{int(recency_score)}, F:{int(frequency_score)}, M:{int(monetary_score)})")
@@ -273,19 +376,12 @@ class ProfileService:
             logger.error(f"Failed to compute lead score: {e}")
             return 0
     
-    async def get_high_value_leads(self, min_score: int = 70) -> list:
+    async def get_high_value_leads(self, min_score: int = 70) -> List[Row]:
         """Get customers with lead score above threshold for targeted marketing."""
         try:
             async with AsyncSessionLocal() as session:
-                query = text("""
-                    SELECT user_id, lead_score, total_purchases, order_count, last_interaction
-                    FROM customer_profiles
-                    WHERE lead_score >= :min_score
-                    ORDER BY lead_score DESC
-                    LIMIT 50
-                """)
-                result = await session.execute(query, {"min_score": min_score})
-                return [dict(row._mapping) for row in result.fetchall()]
+                result = await session.execute(_Q_HIGH_VALUE_LEADS, {"min_score": min_score})
+                return result.fetchall()
         except Exception as e:
             logger.error(f"Failed to get high-value leads: {e}")
             return []
@@ -2,20 +2,35 @@
 Response Cache Service: Two-layer caching (Redis exact match + Semantic similarity).
 Reduces LLM calls by 50-70% for common queries.
 """
-from hashlib import sha256
+from hashlib import blake2b
 from app.services.cache_service import cache_service
 from app.utils.config import settings
-from datetime import datetime
+from app.utils.ttl_cache import TTLCache
 import logging
 import json
+import math
+import re
+import time
 
 logger = logging.getLogger(__name__)
 
 
+def _normalize(vector: list) -> list:
+    """L2-normalize a vector so cosine similarity is a plain dot product."""
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+def _query_hash(query_normalized: str) -> str:
+    """16-hex-char cache key. Non-cryptographic use: BLAKE2b-64 is cheaper than SHA-256 + slice."""
+    return blake2b(query_normalized.encode(), digest_size=8).hexdigest()
+
+
 class ResponseCacheService:
     """Two-layer response caching: exact match (Redis) + semantic (Pinecone)."""
     
     EXACT_TTL = 3600       # 1 hour for exact matches
+    LOCAL_TTL = 30         # In-process copy of exact hits (repeat probes skip Redis)
     SEMANTIC_TTL = 86400   # 24 hours for semantic matches
     SIMILARITY_THRESHOLD = 0.92
     
@@ -32,6 +47,17 @@ class ResponseCacheService:
         "payment methods", "contact"
     ]
     
+    # Each pattern list compiled into one alternation: a single scan per check
+    _PERSONALIZED_RE = re.compile("|".join(map(re.escape, PERSONALIZED_PATTERNS)))
+    _GENERAL_RE = re.compile("|".join(map(re.escape, GENERAL_PATTERNS)))
+    
+    def __init__(self):
+        # Normalized FAQ embeddings and their responses, filled by warm_cache():
+        # semantic FAQ hits are answered in-process without a vector-store query
+        self._faq_vectors: list[tuple[list, str]] = []
+        # query_hash -> response for recent exact hits/writes (hits only, never misses)
+        self._local = TTLCache(maxsize=1024, ttl=self.LOCAL_TTL)
+    
     async def get_cached_response(self, query: str, user_id: str = None) -> str | None:
         """
         Two-layer cache lookup: exact match first, then semantic.
@@ -45,14 +71,22 @@ class ResponseCacheService:
             return None
         
         # Layer 1: Exact Match (Redis)
-        query_hash = sha256(query_normalized.encode()).hexdigest()[:16]
+        query_hash = _query_hash(query_normalized)
         cache_key = f"response_cache:{query_hash}"
         
+        local = self._local.get(query_hash)
+        if local is not None:
+            logger.info(f"Cache HIT (exact, local): {query[:40]}...")
+            return local
+        
         try:
             cached = await cache_service.get_json(cache_key)
             if cached:
                 logger.info(f"Cache HIT (exact): {query[:40]}...")
-                return cached.get("response")
+                response = cached.get("response")
+                if response is not None:
+                    self._local.set(query_hash, response)
+                return response
         except Exception as e:
             logger.warning(f"Redis cache error: {e}")
         
@@ -65,6 +99,12 @@ class ResponseCacheService:
             if not embedding:
                 return None
             
+            # Warmed FAQs first: local cosine similarity, no vector-store round trip
+            faq_response, score = self._match_faq(embedding)
+            if faq_response is not None:
+                logger.info(f"Cache HIT (semantic FAQ, {score:.2f}): {query[:40]}...")
+                return faq_response
+            
             # Search in response cache namespace
             matches = await mcp_service.call_tool("knowledge", "search_response_cache", {
                 "vector": embedding,
@@ -102,15 +142,17 @@ class ResponseCacheService:
             return
         
         # Layer 1: Redis exact match
-        query_hash = sha256(query_normalized.encode()).hexdigest()[:16]
+        query_hash = _query_hash(query_normalized)
+        cached_at = int(time.time())  # Epoch seconds: metadata only, no tz lookup/formatting per write
         cache_key = f"response_cache:{query_hash}"
+        self._local.pop(query_hash)
         
         try:
             await cache_service.set_json(cache_key, {
                 "query": query,
                 "response": response,
                 "topic": topic,
-                "cached_at": datetime.now().isoformat()
+                "cached_at": cached_at
             }, ttl=self.EXACT_TTL)
         except Exception as e:
             logger.warning(f"Redis cache write error: {e}")
@@ -130,7 +172,7 @@ class ResponseCacheService:
                             "query": query,
                             "response": response,
                             "topic": topic or "general",
-                            "cached_at": datetime.now().isoformat()
+                            "cached_at": cached_at
                         }
                     })
                     logger.debug(f"Cached (semantic): {query[:30]}...")
@@ -147,27 +189,84 @@ class ResponseCacheService:
             logger.error(f"Cache invalidation error: {e}")
     
     async def warm_cache(self, faqs: list[tuple[str, str]]):
-        """Pre-populate cache with common FAQs."""
-        for query, response in faqs:
-            await self.cache_response(query, response, topic="faq")
+        """
+        Pre-populate cache with common FAQs.
+        
+        Batched: one embedding call and one vector upsert for all general
+        questions, instead of a serial cache_response() per FAQ.
+        """
+        faqs = [(q, r) for q, r in faqs if not self._is_personalized(r) and len(r) >= 20]
+        if not faqs:
+            return
+        cached_at = int(time.time())
+        
+        # Layer 1: Redis exact match (one pipelined round trip)
+        await cache_service.set_json_many({
+            f"response_cache:{_query_hash(q.lower().strip())}": {
+                "query": q,
+                "response": r,
+                "topic": "faq",
+                "cached_at": cached_at
+            }
+            for q, r in faqs
+        }, ttl=self.EXACT_TTL)
+        
+        # Layer 2: Semantic cache (only for general questions)
+        general = [(q, r) for q, r in faqs if self._is_general_question(q.lower().strip())]
+        if general:
+            try:
+                from app.services.mcp_service import mcp_service
+                
+                normalized = [q.lower().strip() for q, _ in general]
+                result = await mcp_service.call_tool("knowledge", "get_text_embeddings_batch", {"texts": normalized})
+                embeddings = json.loads(result) if isinstance(result, str) and result.startswith("[") else []
+                
+                if len(embeddings) == len(general):
+                    self._faq_vectors = [(_normalize(e), r) for (_, r), e in zip(general, embeddings)]
+                    await mcp_service.call_tool("knowledge", "upsert_response_cache_batch", {"items": [
+                        {
+                            "id": f"cache_{_query_hash(n)}",
+                            "vector": embedding,
+                            "metadata": {"query": q, "response": r, "topic": "faq", "cached_at": cached_at}
+                        }
+                        for (q, r), n, embedding in zip(general, normalized, embeddings)
+                    ]})
+            except Exception as e:
+                logger.warning(f"Semantic cache warm error: {e}")
+        
         logger.info(f"Warmed cache with {len(faqs)} FAQs")
     
     def _is_personalized(self, response: str) -> bool:
         """Check if response contains user-specific data."""
-        response_lower = response.lower()
-        return any(p in response_lower for p in self.PERSONALIZED_PATTERNS)
+        return self._PERSONALIZED_RE.search(response.lower()) is not None
     
     def _is_general_question(self, query: str) -> bool:
         """Check if query is a cacheable general question."""
-        return any(p in query for p in self.GENERAL_PATTERNS)
+        return self._GENERAL_RE.search(query) is not None
+    
+    def _match_faq(self, embedding: list) -> tuple[str | None, float]:
+        """Best warmed FAQ response for an embedding, if it clears SIMILARITY_THRESHOLD."""
+        if not self._faq_vectors:
+            return None, 0.0
+        query_vec = _normalize(embedding)
+        score, response = max(
+            (sum(a * b for a, b in zip(vec, query_vec)), response)
+            for vec, response in self._faq_vectors
+        )
+        if score >= self.SIMILARITY_THRESHOLD:
+            return response, score
+        return None, score
     
     async def _get_text_embedding(self, text: str) -> list | None:
         """Get text embedding using MCP Knowledge server."""
         try:
             from app.services.mcp_service import mcp_service
-            result = await mcp_service.call_tool("knowledge", "get_text_embedding", {"text": text})
-            if result and isinstance(result, list):
-                return result
+            # call_tool returns text: the batch tool answers with a JSON list of vectors
+            result = await mcp_service.call_tool("knowledge", "get_text_embeddings_batch", {"texts": [text]})
+            if isinstance(result, str) and result.startswith("["):
+                vectors = json.loads(result)
+                if vectors:
+                    return vectors[0]
         except Exception as e:
             logger.warning(f"Embedding generation failed: {e}")
         return None
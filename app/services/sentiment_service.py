@@ -5,28 +5,77 @@ Note: Previously used transformers/torch but switched to lightweight keyword app
 to avoid heavy dependencies. For advanced sentiment, consider using an MCP server.
 """
 import logging
+import re
+from typing import Dict, Iterable, Tuple
 
 logger = logging.getLogger(__name__)
 
+_TOKEN_RE = re.compile(r"[a-z']+")
+
+# Intent labels in priority order: the first label with any keyword hit wins
+INTENT_KEYWORDS = (
+    # Include variations of purchase confirmation (I'll take, give me, yes, etc.)
+    ('purchase', ('buy', 'order', 'want', 'get', 'purchase', 'pay', 'checkout', 'cart', 'deliver',
+                  'take', 'give me', "i'll take", 'add to', 'yes', 'reserve', 'proceed')),
+    ('complaint', ('problem', 'issue', 'wrong', 'broken', 'refund', 'return', 'complaint', 'not working')),
+    ('inquiry', ('price', 'cost', 'stock', 'available', 'how much', 'do you have', 'what is', 'show me')),
+    ('greeting', ('hi', 'hello', 'hey', 'good morning', 'good afternoon', 'good evening')),
+)
+
+
+def _build_scanner(keywords: Iterable[str]) -> Tuple["re.Pattern", Dict[str, Tuple[str, ...]]]:
+    """
+    Compile keywords into one zero-width lookahead alternation, so a single
+    finditer() pass reports the longest keyword starting at every position
+    (overlapping hits included), matching the old per-keyword `in` checks.
+    
+    Returns (pattern, prefixes): prefixes maps a matched keyword to every
+    keyword that is a prefix of it, since shorter keywords starting at the
+    same position are shadowed by the longest match.
+    """
+    keywords = sorted(set(keywords), key=len, reverse=True)
+    pattern = re.compile("(?=(" + "|".join(map(re.escape, keywords)) + "))")
+    prefixes = {k: tuple(p for p in keywords if k.startswith(p)) for k in keywords}
+    return pattern, prefixes
+
 
 class SentimentService:
     """Lightweight keyword-based sentiment analysis service."""
     
     # Sentiment word lists
-    POSITIVE_WORDS = {
+    POSITIVE_WORDS = frozenset({
         'thank', 'thanks', 'love', 'great', 'good', 'nice', 'excellent', 'happy', 
         'please', 'yes', 'perfect', 'amazing', 'wonderful', 'awesome', 'appreciate',
         'helpful', 'beautiful', 'best', 'fantastic', 'lovely'
-    }
+    })
     
-    NEGATIVE_WORDS = {
+    NEGATIVE_WORDS = frozenset({
         'bad', 'terrible', 'hate', 'angry', 'upset', 'no', 'never', 'worst', 
         'scam', 'fraud', 'problem', 'issue', 'wrong', 'broken', 'disappointed',
         'horrible', 'awful', 'useless', 'waste', 'poor', 'annoyed', 'frustrated'
-    }
+    })
     
-    STRONG_POSITIVE = {'love', 'excellent', 'amazing', 'perfect', 'fantastic', 'awesome'}
-    STRONG_NEGATIVE = {'hate', 'terrible', 'awful', 'scam', 'fraud', 'worst'}
+    STRONG_POSITIVE = frozenset({'love', 'excellent', 'amazing', 'perfect', 'fantastic', 'awesome'})
+    STRONG_NEGATIVE = frozenset({'hate', 'terrible', 'awful', 'scam', 'fraud', 'worst'})
+    
+    def __init__(self):
+        # All four word lists encoded once into a single table: word -> (positive, negative)
+        # weight, strong words counting 1.5, so scoring is one lookup per matched token
+        self._word_weights = {
+            word: (
+                (word in self.POSITIVE_WORDS) + 0.5 * (word in self.STRONG_POSITIVE),
+                (word in self.NEGATIVE_WORDS) + 0.5 * (word in self.STRONG_NEGATIVE),
+            )
+            for word in self.POSITIVE_WORDS | self.NEGATIVE_WORDS
+        }
+        # Intent keywords include phrases, so they keep a single-pass substring scan
+        self._intent_pattern, self._intent_prefixes = _build_scanner(
+            kw for _, keywords in INTENT_KEYWORDS for kw in keywords
+        )
+        self._intent_rank = {}
+        for rank, (_, keywords) in enumerate(INTENT_KEYWORDS):
+            for kw in keywords:
+                self._intent_rank.setdefault(kw, rank)
     
     def analyze(self, text: str) -> float:
         """
@@ -41,18 +90,19 @@ class SentimentService:
         if not text or len(text.strip()) < 3:
             return 0.0  # Neutral for empty/very short
         
-        text_lower = text.lower()
-        
-        # Count matches
-        pos_count = sum(1 for word in self.POSITIVE_WORDS if word in text_lower)
-        neg_count = sum(1 for word in self.NEGATIVE_WORDS if word in text_lower)
+        # Whole-word matches only ('no' must not fire inside 'not', 'nothing')
+        tokens = set(_TOKEN_RE.findall(text.lower()))
         
-        # Weight strong words more
-        strong_pos = sum(1 for word in self.STRONG_POSITIVE if word in text_lower)
-        strong_neg = sum(1 for word in self.STRONG_NEGATIVE if word in text_lower)
+        # Common case: no sentiment words at all (C-level hash probes, early exit)
+        if tokens.isdisjoint(self._word_weights):
+            return 0.0
         
-        pos_score = pos_count + (strong_pos * 0.5)
-        neg_score = neg_count + (strong_neg * 0.5)
+        # Count matches (strong words weighted more)
+        pos_score = neg_score = 0.0
+        for word in self._word_weights.keys() & tokens:
+            pos, neg = self._word_weights[word]
+            pos_score += pos
+            neg_score += neg
         
         # Calculate final score
         if pos_score > neg_score:
@@ -69,24 +119,13 @@ class SentimentService:
         """
         text_lower = text.lower()
         
-        # Keyword-based classification
-        # Include variations of purchase confirmation (I'll take, give me, yes, etc.)
-        purchase_keywords = {'buy', 'order', 'want', 'get', 'purchase', 'pay', 'checkout', 'cart', 'deliver',
-                            'take', 'give me', "i'll take", 'add to', 'yes', 'reserve', 'proceed'}
-        inquiry_keywords = {'price', 'cost', 'stock', 'available', 'how much', 'do you have', 'what is', 'show me'}
-        complaint_keywords = {'problem', 'issue', 'wrong', 'broken', 'refund', 'return', 'complaint', 'not working'}
-        greeting_keywords = {'hi', 'hello', 'hey', 'good morning', 'good afternoon', 'good evening'}
-        
-        if any(kw in text_lower for kw in purchase_keywords):
-            return 'purchase'
-        elif any(kw in text_lower for kw in complaint_keywords):
-            return 'complaint'
-        elif any(kw in text_lower for kw in inquiry_keywords):
-            return 'inquiry'
-        elif any(kw in text_lower for kw in greeting_keywords):
-            return 'greeting'
-        else:
-            return 'other'
+        # Keyword-based classification: best-priority hit wins, stop early on 'purchase'
+        best = len(INTENT_KEYWORDS)
+        for m in self._intent_pattern.finditer(text_lower):
+            best = min(best, min(self._intent_rank[kw] for kw in self._intent_prefixes[m.group(1)]))
+            if best == 0:
+                break
+        return INTENT_KEYWORDS[best][0] if best < len(INTENT_KEYWORDS) else 'other'
 
 
 # Singleton instance
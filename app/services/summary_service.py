@@ -1,15 +1,107 @@
 """
 Summary Service: Pre-computes daily aggregations for weekly reports.
+
+Range reads (date BETWEEN :start AND :end) are served by
+idx_daily_summaries_date, which INCLUDEs the numeric metric columns so the
+period aggregate is an index-only scan; product lookups use the
+idx_daily_summaries_top_products GIN index.
 """
-from sqlalchemy import text
+from sqlalchemy import Float, Integer, Row, bindparam, func, literal_column, text
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+from app.models.db_models import DailySummary
+from app.services.cache_service import cache_service
 from app.services.db_service import AsyncSessionLocal
 from app.services.mcp_service import mcp_service
-from datetime import datetime, timedelta
+from datetime import date as date_type, datetime, timedelta
+from typing import AsyncIterator, List
+import asyncio
+import heapq
 import logging
 import json
 
 logger = logging.getLogger(__name__)
 
+_Q_MESSAGE_STATS = text("""
+    SELECT COUNT(*), COUNT(DISTINCT user_id), AVG(sentiment_score)
+    FROM message_logs WHERE created_at BETWEEN :start AND :end
+""")
+
+# Typed upsert: top_products / stockout_requests bind as JSONB (Python lists in,
+# serialized by the column type), built once and reused from SQLAlchemy's compiled cache.
+# orders / revenue / products = None means "no order source for this day": a new
+# row gets zeros and an existing row keeps what it has
+_daily_summaries = DailySummary.__table__
+_orders_param = bindparam("orders", type_=Integer)
+_revenue_param = bindparam("revenue", type_=Float)
+_products_param = bindparam("products", type_=JSONB(none_as_null=True))
+_insert_summary = pg_insert(_daily_summaries).values(
+    date=bindparam("date"),
+    total_orders=func.coalesce(_orders_param, 0),
+    total_revenue=func.coalesce(_revenue_param, 0.0),
+    unique_users=bindparam("users"),
+    total_messages=bindparam("messages"),
+    avg_sentiment=bindparam("sentiment"),
+    top_products=func.coalesce(_products_param, literal_column("'[]'::jsonb", JSONB)),
+    stockout_requests=bindparam("stockouts", type_=JSONB),
+)
+_Q_UPSERT_SUMMARY = _insert_summary.on_conflict_do_update(
+    index_elements=[_daily_summaries.c.date],
+    set_={
+        **{
+            name: _insert_summary.excluded[name]
+            for name in ("unique_users", "total_messages", "avg_sentiment", "stockout_requests")
+        },
+        "total_orders": func.coalesce(_orders_param, _daily_summaries.c.total_orders),
+        "total_revenue": func.coalesce(_revenue_param, _daily_summaries.c.total_revenue),
+        "top_products": func.coalesce(_products_param, _daily_summaries.c.top_products),
+    },
+)
+
+# Per-day message stats for a whole backfill range in one scan
+_Q_DAILY_MESSAGE_STATS = text("""
+    SELECT CAST(created_at AS date) AS day, COUNT(*), COUNT(DISTINCT user_id), AVG(sentiment_score)
+    FROM message_logs WHERE created_at BETWEEN :start AND :end
+    GROUP BY day
+""")
+
+_Q_SUMMARIES_FOR_PERIOD = text(
+    "SELECT * FROM daily_summaries WHERE date BETWEEN :start AND :end ORDER BY date ASC"
+)
+
+# Period totals; an empty range yields zeros like the per-row reducer did
+_Q_AGGREGATE_PERIOD = text("""
+    SELECT
+        COALESCE(SUM(total_orders), 0) AS total_orders,
+        COALESCE(SUM(total_revenue), 0.0) AS total_revenue,
+        COALESCE(SUM(unique_users), 0) AS unique_users,
+        COALESCE(SUM(total_messages), 0) AS total_messages,
+        COALESCE(AVG(avg_sentiment), 0.0) AS avg_sentiment
+    FROM daily_summaries
+    WHERE date BETWEEN :start AND :end
+""")
+
+_Q_DAYS_WITH_PRODUCT = text("""
+    SELECT date FROM daily_summaries
+    WHERE top_products @> CAST(:probe AS jsonb) AND date BETWEEN :start AND :end
+    ORDER BY date ASC
+""")
+
+# Aggregates over closed ranges never change until a summary inside them is recomputed
+AGGREGATE_CACHE_PREFIX = "agg:"
+AGGREGATE_TTL_CLOSED = 86400
+AGGREGATE_TTL_OPEN = 60
+
+# Running per-day order tally, fed by paid-order events (see record_order)
+DAILY_TALLY_PREFIX = "daily:"
+DAILY_TALLY_TTL = 3 * 86400
+TOP_PRODUCTS_LIMIT = 5
+# Concurrent per-day order lookups (2 Redis reads + maybe an MCP call each) during a backfill
+BACKFILL_CONCURRENCY = 8
+
+
+def _as_date(value) -> date_type:
+    return value.date() if isinstance(value, datetime) else value
+
 
 class SummaryService:
     async def compute_daily_summary(self, date: datetime.date = None):
@@ -22,76 +114,209 @@ class SummaryService:
         
         try:
             async with AsyncSessionLocal() as session:
-                # Message stats
-                msg_result = await session.execute(text("""
-                    SELECT COUNT(*), COUNT(DISTINCT user_id), AVG(sentiment_score)
-                    FROM message_logs WHERE created_at BETWEEN :start AND :end
-                """), {"start": start_of_day, "end": end_of_day})
-                msg_row = msg_result.fetchone()
-                
-                total_messages = msg_row[0] or 0
-                unique_users = msg_row[1] or 0
-                avg_sentiment = msg_row[2] or 0.0
+                # Message stats (DB) and orders (Redis tally, POS as fallback) are
+                # independent: overlap the round trips
+                msg_result, orders = await asyncio.gather(
+                    session.execute(_Q_MESSAGE_STATS, {"start": start_of_day, "end": end_of_day}),
+                    self._orders_for_day(date),
+                )
+                total_messages, unique_users, avg_sentiment = msg_result.fetchone()
+                total_orders, total_revenue, top_products = orders or (None, None, None)
                 
-                # POS orders
-                total_orders, total_revenue, top_products = 0, 0.0, []
-                try:
-                    orders_data = await mcp_service.call_tool("pos", "get_orders_by_date", {"date": date.isoformat()})
-                    if orders_data and isinstance(orders_data, dict):
-                        total_orders = orders_data.get("count", 0)
-                        total_revenue = orders_data.get("total", 0.0)
-                        top_products = orders_data.get("top_items", [])
-                except Exception as e:
-                    logger.warning(f"Could not fetch POS orders: {e}")
-                
-                # Upsert summary
-                await session.execute(text("""
-                    INSERT INTO daily_summaries (date, total_orders, total_revenue, unique_users, total_messages, avg_sentiment, top_products, stockout_requests)
-                    VALUES (:date, :orders, :revenue, :users, :messages, :sentiment, :products, :stockouts)
-                    ON CONFLICT (date) DO UPDATE SET
-                        total_orders = :orders, total_revenue = :revenue, unique_users = :users,
-                        total_messages = :messages, avg_sentiment = :sentiment, top_products = :products, stockout_requests = :stockouts
-                """), {
-                    "date": date, "orders": total_orders, "revenue": total_revenue, "users": unique_users,
-                    "messages": total_messages, "sentiment": avg_sentiment, "products": json.dumps(top_products), "stockouts": "[]"
+                await session.execute(_Q_UPSERT_SUMMARY, {
+                    "date": date, "orders": total_orders, "revenue": total_revenue,
+                    "users": unique_users or 0, "messages": total_messages or 0,
+                    "sentiment": avg_sentiment or 0.0, "products": top_products, "stockouts": []
                 })
                 await session.commit()
                 
                 logger.info(f"Summary for {date}: {unique_users} users, {total_messages} msgs, {total_orders} orders")
+                await self._invalidate_aggregates(date)
+                if orders is not None and date < date_type.today():
+                    # Day is closed and its orders persisted; the tally is no longer needed
+                    key = f"{DAILY_TALLY_PREFIX}{date.isoformat()}"
+                    await cache_service.delete_many([key, f"{key}:items"])
                 return True
                 
         except Exception as e:
             logger.error(f"Failed to compute summary: {e}")
             return False
     
-    async def get_summaries_for_period(self, start_date, end_date) -> list:
-        """Get pre-computed summaries for a date range."""
+    async def compute_daily_summaries_bulk(self, dates: list) -> bool:
+        """
+        Backfill summaries for many dates: one grouped message_logs scan, order
+        data per day fetched with bounded concurrency, and a single executemany upsert.
+        """
+        dates = sorted(set(dates))
+        if not dates:
+            return True
+        
+        start = datetime.combine(dates[0], datetime.min.time())
+        end = datetime.combine(dates[-1], datetime.max.time())
+        limiter = asyncio.Semaphore(BACKFILL_CONCURRENCY)
+        
+        async def orders_for_day(day):
+            async with limiter:
+                return await self._orders_for_day(day)
+        
         try:
             async with AsyncSessionLocal() as session:
-                result = await session.execute(text(
-                    "SELECT * FROM daily_summaries WHERE date BETWEEN :start AND :end ORDER BY date ASC"
-                ), {"start": start_date, "end": end_date})
-                return [dict(row._mapping) for row in result.fetchall()]
+                msg_result, *orders = await asyncio.gather(
+                    session.execute(_Q_DAILY_MESSAGE_STATS, {"start": start, "end": end}),
+                    *(orders_for_day(day) for day in dates),
+                )
+                stats = {row[0]: row[1:] for row in msg_result.fetchall()}
+                
+                params = []
+                for day, day_orders in zip(dates, orders):
+                    total_messages, unique_users, avg_sentiment = stats.get(day, (0, 0, 0.0))
+                    # None (no tally or POS data) keeps the stored order figures
+                    total_orders, total_revenue, top_products = day_orders or (None, None, None)
+                    params.append({
+                        "date": day, "orders": total_orders, "revenue": total_revenue,
+                        "users": unique_users or 0, "messages": total_messages or 0,
+                        "sentiment": avg_sentiment or 0.0, "products": top_products, "stockouts": []
+                    })
+                
+                await session.execute(_Q_UPSERT_SUMMARY, params)
+                await session.commit()
+            
+            logger.info(f"Backfilled {len(dates)} daily summaries ({dates[0]} to {dates[-1]})")
+            await self._invalidate_aggregates(*dates)
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to backfill summaries: {e}")
+            return False
+    
+    async def _orders_for_day(self, date):
+        """
+        (orders, revenue, top_products) for a day: Redis tally first, POS tool as
+        fallback. None when neither has data, so the stored figures are kept.
+        """
+        tally = await self._read_order_tally(date)
+        if tally is not None:
+            return tally
+        try:
+            orders_data = await mcp_service.call_tool("pos", "get_orders_by_date", {"date": date.isoformat()})
+        except Exception as e:
+            logger.warning(f"Could not fetch POS orders for {date}: {e}")
+            return None
+        if orders_data and isinstance(orders_data, dict):
+            return orders_data.get("count", 0), orders_data.get("total", 0.0), orders_data.get("top_items")
+        return None
+    
+    async def record_order(self, amount: float, items: list = None, when: datetime = None):
+        """
+        Add a paid order to its day's running tally: count and revenue in
+        daily:{date}, per-product quantities in daily:{date}:items.
+        """
+        key = f"{DAILY_TALLY_PREFIX}{(when or datetime.now()).date().isoformat()}"
+        quantities = {}
+        for item in items or []:
+            name = item.get("name") if isinstance(item, dict) else None
+            if name:
+                try:
+                    quantity = int(item.get("quantity") or 1)
+                except (TypeError, ValueError):
+                    quantity = 1
+                quantities[name] = quantities.get(name, 0) + quantity
+        
+        updates = {key: {"count": 1, "total": float(amount)}}
+        if quantities:
+            updates[f"{key}:items"] = quantities
+        await cache_service.hincr_many(updates, expire=DAILY_TALLY_TTL)
+    
+    async def _read_order_tally(self, date):
+        """Return (orders, revenue, top_products) from the day's tally, or None if there is none."""
+        key = f"{DAILY_TALLY_PREFIX}{date.isoformat()}"
+        totals, items = await asyncio.gather(cache_service.hgetall(key), cache_service.hgetall(f"{key}:items"))
+        if not totals:
+            return None
+        
+        top = heapq.nlargest(TOP_PRODUCTS_LIMIT, items.items(), key=lambda kv: int(kv[1]))
+        top_products = [{"name": name, "quantity": int(quantity)} for name, quantity in top]
+        return int(totals.get("count", 0)), float(totals.get("total", 0.0)), top_products
+    
+    async def iter_summaries_for_period(self, start_date, end_date) -> AsyncIterator[Row]:
+        """
+        Stream pre-computed summaries for a date range (server-side cursor, one row at a time).
+        Rows are yielded as-is (attribute access, e.g. row.total_orders) without a dict copy.
+        """
+        async with AsyncSessionLocal() as session:
+            result = await session.stream(_Q_SUMMARIES_FOR_PERIOD, {"start": start_date, "end": end_date})
+            async for row in result:
+                yield row
+    
+    async def get_summaries_for_period(self, start_date, end_date) -> List[Row]:
+        """Get pre-computed summaries for a date range."""
+        try:
+            return [s async for s in self.iter_summaries_for_period(start_date, end_date)]
         except Exception as e:
             logger.error(f"Failed to get summaries: {e}")
             return []
     
+    async def find_days_with_product(self, item, start_date, end_date) -> list:
+        """
+        Get summary dates whose top_products contain `item` (a product name,
+        or a partial dict such as {"sku": "..."}). Served by the GIN index.
+        """
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(_Q_DAYS_WITH_PRODUCT, {"probe": json.dumps([item]), "start": start_date, "end": end_date})
+                return [row.date for row in result.fetchall()]
+        except Exception as e:
+            logger.error(f"Failed to search summaries for product: {e}")
+            return []
+    
     async def get_aggregated_summary(self, start_date, end_date) -> dict:
-        """Get aggregated metrics for a period."""
-        summaries = await self.get_summaries_for_period(start_date, end_date)
+        """
+        Get aggregated metrics for a period, cached in Redis per (start, end).
+        Closed ranges (ending before today) are kept for a day; open ones for a minute.
+        """
+        start_date, end_date = _as_date(start_date), _as_date(end_date)
+        key = f"{AGGREGATE_CACHE_PREFIX}{start_date.isoformat()}:{end_date.isoformat()}"
+        
+        cached = await cache_service.get_json(key)
+        if cached:
+            return cached
+        
+        summary = await self._aggregate_from_db(start_date, end_date)
+        if summary is not None:
+            ttl = AGGREGATE_TTL_CLOSED if end_date < date_type.today() else AGGREGATE_TTL_OPEN
+            await cache_service.set_json(key, summary, ttl=ttl)
+            return summary
         
-        if not summaries:
-            return {"period_start": str(start_date), "period_end": str(end_date), "total_orders": 0, "total_revenue": 0.0, "unique_users": 0, "total_messages": 0, "avg_sentiment": 0.0}
+        return {"period_start": str(start_date), "period_end": str(end_date), "total_orders": 0, "total_revenue": 0.0, "unique_users": 0, "total_messages": 0, "avg_sentiment": 0.0}
+    
+    async def _aggregate_from_db(self, start_date, end_date):
+        """Aggregate the period server-side in one query; None on failure (not cached)."""
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(_Q_AGGREGATE_PERIOD, {"start": start_date, "end": end_date})
+                row = result.one()
+        except Exception as e:
+            logger.error(f"Failed to aggregate summaries: {e}")
+            return None
         
         return {
             "period_start": str(start_date),
             "period_end": str(end_date),
-            "total_orders": sum(s.get("total_orders", 0) for s in summaries),
-            "total_revenue": sum(s.get("total_revenue", 0.0) for s in summaries),
-            "unique_users": sum(s.get("unique_users", 0) for s in summaries),
-            "total_messages": sum(s.get("total_messages", 0) for s in summaries),
-            "avg_sentiment": round(sum(s.get("avg_sentiment", 0.0) for s in summaries) / len(summaries), 2)
+            "total_orders": row.total_orders,
+            "total_revenue": row.total_revenue,
+            "unique_users": row.unique_users,
+            "total_messages": row.total_messages,
+            "avg_sentiment": round(row.avg_sentiment, 2)
         }
-
+    
+    async def _invalidate_aggregates(self, *dates):
+        """Drop cached aggregates whose range covers any freshly recomputed day."""
+        days = [d.isoformat() for d in dates]
+        stale = []
+        for key in await cache_service.scan_keys(f"{AGGREGATE_CACHE_PREFIX}*"):
+            start, _, end = key[len(AGGREGATE_CACHE_PREFIX):].partition(":")
+            if any(start <= day <= end for day in days):  # ISO dates compare lexicographically
+                stale.append(key)
+        await cache_service.delete_many(stale)
 
 summary_service = SummaryService()
@@ -1,12 +1,19 @@
 """
 Twilio Service: WhatsApp messaging via Twilio API.
 """
+import asyncio
 import logging
+import re
 from typing import Optional
 from app.utils.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Nigerian local format (0XXXXXXXXXX) -> E.164
+_NG_LOCAL = re.compile(r"^0(\d{10})$")
+# Whitespace and dash separators removed in one pass
+_PHONE_STRIP = str.maketrans("", "", " -\t\n")
+
 class TwilioService:
     """Handles WhatsApp messaging via Twilio API."""
     
@@ -15,6 +22,7 @@ class TwilioService:
         self.auth_token = settings.TWILIO_AUTH_TOKEN
         self.from_number = settings.TWILIO_PHONE_NUMBER
         self._client = None
+        self._from_number_formatted = self._get_from_number()
 
     @property
     def client(self):
@@ -32,11 +40,8 @@ class TwilioService:
         if not phone:
             return ""
         
-        clean = phone.strip()
         # Basic normalization for Nigeria (specific to this project context based on observed code)
-        if clean.startswith("0") and len(clean) == 11:
-            clean = "+234" + clean[1:]
-            
+        clean = _NG_LOCAL.sub(r"+234\1", phone.translate(_PHONE_STRIP))
         if not clean.startswith("whatsapp:"):
             return f"whatsapp:{clean}"
         return clean
@@ -55,10 +60,12 @@ class TwilioService:
             return {"status": "error", "provider": "twilio", "error": "Twilio not configured"}
 
         try:
-            from_num = self._get_from_number()
+            from_num = self._from_number_formatted
             to_num = self._format_whatsapp_number(to_phone)
             
-            message = self.client.messages.create(
+            # Twilio's REST client is synchronous; keep its round trip off the event loop
+            message = await asyncio.to_thread(
+                self.client.messages.create,
                 body=text,
                 from_=from_num,
                 to=to_num
@@ -74,12 +81,13 @@ class TwilioService:
             return {"status": "error", "provider": "twilio", "error": "Twilio not configured"}
 
         try:
-            from_num = self._get_from_number()
+            from_num = self._from_number_formatted
             to_num = self._format_whatsapp_number(to_phone)
             
             # Twilio handles media via media_url list
             # Note: Caption is only supported by some WhatsApp providers on Twilio but generally passed as body
-            message = self.client.messages.create(
+            message = await asyncio.to_thread(
+                self.client.messages.create,
                 body=caption,
                 media_url=[image_url],
                 from_=from_num,
@@ -5,7 +5,6 @@ This follows strict typing and consistent naming conventions.
 from typing import TypedDict, Annotated, List, Dict, Optional, Literal
 from langchain_core.messages import BaseMessage
 from langgraph.graph import add_messages
-import operator
 
 
 def replace_dict(left: Optional[Dict], right: Optional[Dict]) -> Optional[Dict]:
@@ -16,6 +15,17 @@ def replace_dict(left: Optional[Dict], right: Optional[Dict]) -> Optional[Dict]:
     return left if left is not None else {}
 
 
+def merge_dict(left: Optional[Dict], right: Optional[Dict]) -> Dict:
+    """Merge reducer: keys from right win, like `left | right`.
+    Pure: checkpoints and state snapshots hold on to earlier values, so a
+    merge always builds a new dict; an empty update returns left unchanged."""
+    if not right:
+        return left if left is not None else {}
+    if not left:
+        return dict(right)
+    return {**left, **right}
+
+
 class AgentState(TypedDict):
     """
     Unified state schema for all agents in the system.
@@ -147,13 +157,13 @@ class AgentState(TypedDict):
     supervisor_output_verdict: Optional[str]
     """Verdict from the Output Supervisor"""
 
-    worker_outputs: Annotated[Dict[str, str], operator.or_]
+    worker_outputs: Annotated[Dict[str, str], merge_dict]
     """Map of task_id -> worker output string. Merged safely."""
 
     next_workers: Optional[List[str]]
     """Temp field for Dispatcher routing"""
 
-    worker_tool_outputs: Annotated[Dict[str, List[Dict]], operator.or_]
+    worker_tool_outputs: Annotated[Dict[str, List[Dict]], merge_dict]
     """Map of task_id -> List of {tool, args, output}. For Reviewer evidence."""
 
     # ========== Response Metadata ==========
@@ -3,12 +3,18 @@ Admin Tools: Manager-facing tools for customer messaging and incident management
 """
 from langchain_core.tools import tool
 from sqlalchemy import text
-from app.services.db_service import AsyncSessionLocal
+from app.services.db_service import AsyncSessionLocal, exec_write
 from app.services.meta_service import meta_service
+from app.services.profile_service import profile_service
+from datetime import datetime, timedelta
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Separators stripped from admin-typed phone numbers in one pass
+_PHONE_STRIP = str.maketrans("", "", " -\t\n")
+
 
 @tool
 async def relay_message_to_customer(customer_id: str, message: str) -> str:
@@ -17,13 +23,13 @@ async def relay_message_to_customer(customer_id: str, message: str) -> str:
         if not customer_id or not message:
             return "Error: Both customer_id and message are required."
         
-        clean_id = customer_id.replace(" ", "").replace("-", "")
+        clean_id = customer_id.translate(_PHONE_STRIP)
         if not clean_id.startswith("+"):
             clean_id = "+" + clean_id
         
-        result = await meta_service.send_whatsapp_message(recipient_id=clean_id, message_text=message)
+        result = await meta_service.send_whatsapp_text(clean_id, message)
         
-        if result:
+        if result and result.get("status") != "error":
             logger.info(f"Message relayed to {clean_id}")
             return f"✅ Message sent to {clean_id}: '{message}'"
         return f"❌ Failed to send message to {clean_id}."
@@ -33,33 +39,47 @@ async def relay_message_to_customer(customer_id: str, message: str) -> str:
         return f"Error: {str(e)}"
 
 
+# Only the fields rendered in the STAR report
+_INCIDENT_COLUMNS = "id, user_id, status, situation, task, action, result"
+
+_Q_INCIDENT_BY_ID = text(f"SELECT {_INCIDENT_COLUMNS} FROM incidents WHERE id::text = :id")
+_Q_INCIDENTS_BY_USER = text(f"SELECT {_INCIDENT_COLUMNS} FROM incidents WHERE user_id = :user_id ORDER BY created_at DESC LIMIT 5")
+_Q_OPEN_INCIDENTS = text(f"SELECT {_INCIDENT_COLUMNS} FROM incidents WHERE status IN ('OPEN', 'ESCALATED') ORDER BY created_at DESC LIMIT 5")
+
+_Q_RESOLVE_INCIDENT = text("""
+    UPDATE incidents SET status = 'RESOLVED', result = :resolution, resolved_at = NOW()
+    WHERE id::text = :id
+""")
+
+_INCIDENT_TEMPLATE = """---
+**ID**: {id} | **User**: {user_id} | **Status**: {status}
+**STAR**: Situation: {situation} | Task: {task} | Action: {action} | Result: {result}
+"""
+
+
 @tool
 async def get_incident_context(incident_id: str = None, user_id: str = None) -> str:
     """Get incident details for Manager review. Returns STAR format report."""
     try:
+        if incident_id:
+            query, params = _Q_INCIDENT_BY_ID, {"id": incident_id}
+        elif user_id:
+            query, params = _Q_INCIDENTS_BY_USER, {"user_id": user_id}
+        else:
+            query, params = _Q_OPEN_INCIDENTS, {}
+        
         async with AsyncSessionLocal() as session:
-            if incident_id:
-                query = text("SELECT * FROM incidents WHERE id::text = :id")
-                result = await session.execute(query, {"id": incident_id})
-            elif user_id:
-                query = text("SELECT * FROM incidents WHERE user_id = :user_id ORDER BY created_at DESC LIMIT 5")
-                result = await session.execute(query, {"user_id": user_id})
-            else:
-                query = text("SELECT * FROM incidents WHERE status IN ('OPEN', 'ESCALATED') ORDER BY created_at DESC LIMIT 5")
-                result = await session.execute(query)
-            
-            rows = result.fetchall()
-            if not rows:
-                return "No incidents found."
-            
-            output = "📋 **Incident Report(s)**\n\n"
-            for row in rows:
-                r = dict(row._mapping)
-                output += f"""---
-**ID**: {r.get('id', 'N/A')} | **User**: {r.get('user_id', 'Unknown')} | **Status**: {r.get('status', 'N/A')}
-**STAR**: Situation: {r.get('situation', 'N/A')} | Task: {r.get('task', 'N/A')} | Action: {r.get('action', 'N/A')} | Result: {r.get('result', 'N/A')}
-"""
-            return output
+            # Server-side cursor: each row is rendered as it arrives instead of
+            # buffering the whole result first
+            result = await session.stream(query, params)
+            parts = ["📋 **Incident Report(s)**\n\n"]
+            # RowMapping is a read-only view over the row: no per-row dict copy
+            async for row in result:
+                parts.append(_INCIDENT_TEMPLATE.format_map(row._mapping))
+        
+        if len(parts) == 1:
+            return "No incidents found."
+        return "".join(parts)
             
     except Exception as e:
         logger.error(f"Get incident error: {e}")
@@ -70,18 +90,13 @@ async def get_incident_context(incident_id: str = None, user_id: str = None) ->
 async def resolve_incident(incident_id: str, resolution: str) -> str:
     """Mark an incident as resolved with a resolution note."""
     try:
-        async with AsyncSessionLocal() as session:
-            query = text("""
-                UPDATE incidents SET status = 'RESOLVED', result = :resolution, resolved_at = NOW()
-                WHERE id::text = :id RETURNING id
-            """)
-            result = await session.execute(query, {"id": incident_id, "resolution": resolution})
-            await session.commit()
-            
-            if result.fetchone():
-                return f"✅ Incident {incident_id} marked as RESOLVED."
+        # Single statement in autocommit: no BEGIN/COMMIT round trips, and an
+        # unknown id simply matches no rows
+        result = await exec_write(_Q_RESOLVE_INCIDENT, {"id": incident_id, "resolution": resolution})
+        if not result.rowcount:
             return f"❌ Incident {incident_id} not found."
-                
+        return f"✅ Incident {incident_id} marked as RESOLVED."
+            
     except Exception as e:
         logger.error(f"Resolve incident error: {e}")
         return f"Error: {str(e)}"
@@ -95,9 +110,6 @@ async def get_top_customers(period: str = "week", limit: int = 10) -> str:
     Use this when admin asks "Who patronised us most?" or "Top customers".
     """
     try:
-        from app.services.profile_service import profile_service
-        from datetime import datetime, timedelta
-        
         # Calculate date range
         now = datetime.now()
         if period == "week":
@@ -111,18 +123,17 @@ async def get_top_customers(period: str = "week", limit: int = 10) -> str:
             period_label = "All Time"
         
         async with AsyncSessionLocal() as session:
-            # Get customers with orders in period
+            # Customers with purchases in period, ranked by their stored lead score
             query = text("""
                 SELECT 
                     cp.user_id,
+                    cp.order_count,
                     cp.total_purchases,
-                    cp.total_spent,
-                    cp.last_purchase_at,
-                    cp.avg_sentiment
+                    COALESCE(cp.lead_score, 0) AS lead_score
                 FROM customer_profiles cp
-                WHERE cp.last_purchase_at >= :start_date
+                WHERE cp.last_interaction >= :start_date
                   AND cp.total_purchases > 0
-                ORDER BY cp.total_spent DESC
+                ORDER BY COALESCE(cp.lead_score, 0) DESC, cp.total_purchases DESC
                 LIMIT :limit
             """)
             result = await session.execute(query, {"start_date": start_date, "limit": limit})
@@ -130,29 +141,32 @@ async def get_top_customers(period: str = "week", limit: int = 10) -> str:
             
             if not rows:
                 return f"📊 No customers with purchases in {period_label.lower()}."
-            
-            # Compute lead scores and format output
-            output = f"📊 **Top Customers - {period_label}**\n\n"
-            output += "| Rank | Customer | Orders | Spent | Score |\n"
-            output += "|------|----------|--------|-------|-------|\n"
-            
-            for i, row in enumerate(rows, 1):
-                r = dict(row._mapping)
-                user_id = r.get('user_id', 'Unknown')
-                # Mask user ID for privacy
-                masked_id = f"...{user_id[-6:]}" if len(user_id) > 6 else user_id
-                orders = r.get('total_purchases', 0)
-                spent = r.get('total_spent', 0)
-                
-                # Compute lead score using profile service
-                try:
-                    score = await profile_service.compute_lead_score(user_id)
-                except:
-                    score = 50  # Default if computation fails
-                
-                output += f"| {i} | {masked_id} | {orders} | ₦{spent:,.0f} | {score}/100 |\n"
-            
-            return output
+        
+        # Profiles that were never scored (0) are scored now, concurrently
+        scores = {row.user_id: row.lead_score for row in rows}
+        unscored = [user_id for user_id, score in scores.items() if not score]
+        if unscored:
+            fresh = await asyncio.gather(
+                *(profile_service.compute_lead_score(user_id) for user_id in unscored),
+                return_exceptions=True
+            )
+            for user_id, score in zip(unscored, fresh):
+                scores[user_id] = 50 if isinstance(score, BaseException) else score  # Default if computation fails
+            rows = sorted(rows, key=lambda r: (scores[r.user_id], r.total_purchases), reverse=True)
+        
+        parts = [
+            f"📊 **Top Customers - {period_label}**\n\n",
+            "| Rank | Customer | Orders | Spent | Score |\n",
+            "|------|----------|--------|-------|-------|\n",
+        ]
+        
+        for i, row in enumerate(rows, 1):
+            user_id = row.user_id
+            # Mask user ID for privacy
+            masked_id = f"...{user_id[-6:]}" if len(user_id) > 6 else user_id
+            parts.append(f"| {i} | {masked_id} | {row.order_count} | ₦{row.total_purchases:,.0f} | {scores[user_id]}/100 |\n")
+        
+        return "".join(parts)
             
     except Exception as e:
         logger.error(f"Get top customers error: {e}")
@@ -10,11 +10,25 @@ from app.utils.config import settings
 from app.services.cache_service import cache_service
 import logging
 import json
+import time
 
 logger = logging.getLogger(__name__)
 
 WAITLIST_KEY = "approval_waitlist"
 
+# Waitlist entries are small fixed-shape dicts stored with one-letter keys
+# ({"a": amount, "i": items, "t": epoch seconds}) to keep HGETALL payloads small
+_encode_entry = json.JSONEncoder(separators=(",", ":")).encode
+_decode_json = json.JSONDecoder().decode
+
+
+def _decode_entry(raw: str) -> dict:
+    """Decode a stored entry to {amount, items, timestamp} (also reads the old long-key form)."""
+    data = _decode_json(raw)
+    if "a" not in data:
+        return data
+    return {"amount": data["a"], "items": data["i"], "timestamp": data.get("t")}
+
 
 async def get_waitlist() -> dict:
     """
@@ -22,7 +36,7 @@ async def get_waitlist() -> dict:
     Returns dict of {user_id: order_data}.
     """
     raw_dict = await cache_service.hgetall(WAITLIST_KEY)
-    return {k: json.loads(v) for k, v in raw_dict.items()} if raw_dict else {}
+    return {k: _decode_entry(v) for k, v in raw_dict.items()} if raw_dict else {}
 
 
 async def add_to_waitlist(user_id: str, amount: float, items: str):
@@ -30,17 +44,54 @@ async def add_to_waitlist(user_id: str, amount: float, items: str):
     Atomically adds an order to the waitlist using HSET.
     Prevents race conditions where concurrent adds would lose data.
     """
-    order_data = json.dumps({"amount": amount, "items": items, "timestamp": "now"})
+    order_data = _encode_entry({"a": amount, "i": items, "t": int(time.time())})
     await cache_service.hset(WAITLIST_KEY, user_id, order_data)
     logger.info(f"Added {user_id} to approval waitlist (atomic)")
 
 
-async def remove_from_waitlist(user_id: str):
+async def remove_from_waitlist(user_id: str) -> bool:
     """
     Atomically removes an order from the waitlist using HDEL.
+    Returns False if the user was not on the waitlist, so the HDEL doubles as
+    the membership check and two concurrent approvals can't both succeed.
     """
-    await cache_service.hdel(WAITLIST_KEY, user_id)
-    logger.info(f"Removed {user_id} from approval waitlist (atomic)")
+    removed = await cache_service.hpop(WAITLIST_KEY, user_id)
+    if removed:
+        logger.info(f"Removed {user_id} from approval waitlist (atomic)")
+    return removed
+
+
+async def _take_from_waitlist(user_id: str):
+    """
+    Remove a user's order and read what is still pending in one MULTI/EXEC
+    round trip. Returns (removed, remaining_waitlist).
+    """
+    try:
+        async with cache_service.pipeline(transaction=True) as pipe:
+            pipe.hdel(WAITLIST_KEY, user_id)
+            pipe.hgetall(WAITLIST_KEY)
+            removed, remaining = await pipe.execute()
+    except Exception as e:
+        logger.error(f"Waitlist removal failed for {user_id}: {e}")
+        return False, {}
+    if removed:
+        logger.info(f"Removed {user_id} from approval waitlist (atomic)")
+    return removed == 1, {k: _decode_entry(v) for k, v in remaining.items()}
+
+
+def _format_waitlist(waitlist: dict) -> str:
+    lines = ["📋 *PENDING APPROVALS:*"]
+    lines.extend(f"{i}. {uid} - ₦{data['amount']:,.2f} ({data['items']})" for i, (uid, data) in enumerate(waitlist.items(), 1))
+    return "\n".join(lines) + "\n"
+
+
+async def _resolve_single_pending():
+    """Return (user_id, pending_count): the user_id only when exactly one order is pending."""
+    pending = await cache_service.hlen(WAITLIST_KEY)
+    if pending != 1:
+        return None, pending
+    keys = await cache_service.hkeys(WAITLIST_KEY)
+    return (keys[0] if keys else None), pending
 
 
 @tool
@@ -49,10 +100,11 @@ async def request_order_approval(user_id: str, amount: float, items_summary: str
     if not settings.ADMIN_PHONE_NUMBERS:
         return "No admin configured."
         
-    await add_to_waitlist(user_id, amount, items_summary)
-    
     msg = f"🚨 *HIGH VALUE ORDER*\n👤 {user_id}\n💰 ₦{amount:,.2f}\n📦 {items_summary}\n----\nReply *'Approve'* or *'Reject'*"
-    await meta_service.send_whatsapp_text(settings.ADMIN_PHONE_NUMBERS[0], msg)
+    await add_to_waitlist(user_id, amount, items_summary)
+    # Queued, not awaited: alerts raised within a short window reach the
+    # admin as one message
+    meta_service.queue_whatsapp_text(settings.ADMIN_PHONE_NUMBERS[0], msg)
     return "Approval request sent."
 
 
@@ -62,49 +114,42 @@ async def list_pending_approvals():
     waitlist = await get_waitlist()
     if not waitlist:
         return "No pending approvals."
-    text = "📋 *PENDING APPROVALS:*\n"
-    for i, (uid, data) in enumerate(waitlist.items(), 1):
-        text += f"{i}. {uid} - ₦{data['amount']:,.2f} ({data['items']})\n"
-    return text
+    return _format_waitlist(waitlist)
 
 
 @tool
 async def approve_order(target_user_id: str = None):
     """Approve an order. Auto-resolves if only one pending."""
-    waitlist = await get_waitlist()
-    
     if not target_user_id:
-        if len(waitlist) == 1:
-            target_user_id = list(waitlist.keys())[0]
-        elif len(waitlist) > 1:
-            return f"⚠️ Ambiguous: {len(waitlist)} pending. Specify which user.\n" + await list_pending_approvals()
-        else:
+        target_user_id, pending = await _resolve_single_pending()
+        if pending > 1:
+            return f"⚠️ Ambiguous: {pending} pending. Specify which user.\n" + await list_pending_approvals.ainvoke({})
+        if not target_user_id:
             return "No pending orders."
 
-    if target_user_id not in waitlist:
+    removed, remaining = await _take_from_waitlist(target_user_id)
+    if not removed:
         return f"Error: {target_user_id} not on waitlist."
         
-    await remove_from_waitlist(target_user_id)
     await meta_service.send_whatsapp_text(target_user_id, "✅ *Order Approved!*\nPlease proceed with payment.")
-    return f"✅ Approved {target_user_id}."
+    reply = f"✅ Approved {target_user_id}."
+    return f"{reply}\n\n{_format_waitlist(remaining)}" if remaining else reply
 
 
 @tool
 async def reject_order(target_user_id: str = None, reason: str = "Manager declined"):
     """Reject an order with a reason."""
-    waitlist = await get_waitlist()
-    
     if not target_user_id:
-        if len(waitlist) == 1:
-            target_user_id = list(waitlist.keys())[0]
-        elif len(waitlist) > 1:
-            return f"⚠️ Which user to reject?\n" + await list_pending_approvals()
-        else:
+        target_user_id, pending = await _resolve_single_pending()
+        if pending > 1:
+            return f"⚠️ Which user to reject?\n" + await list_pending_approvals.ainvoke({})
+        if not target_user_id:
             return "No pending orders."
 
-    if target_user_id not in waitlist:
+    removed, remaining = await _take_from_waitlist(target_user_id)
+    if not removed:
         return f"Error: {target_user_id} not found."
         
-    await remove_from_waitlist(target_user_id)
     await meta_service.send_whatsapp_text(target_user_id, f"⚠️ *Order Update*\n{reason}\nContact us to adjust.")
-    return f"🚫 Rejected {target_user_id}. Reason: {reason}"
+    reply = f"🚫 Rejected {target_user_id}. Reason: {reason}"
+    return f"{reply}\n\n{_format_waitlist(remaining)}" if remaining else reply
@@ -6,15 +6,25 @@ All tools integrate with LangGraph state for proper state management.
 """
 from langchain_core.tools import tool
 from app.tools.product_tools import search_products
+from app.utils.ttl_cache import TTLCache
 from typing import Dict, List, Optional
 import logging
 import re
 
 logger = logging.getLogger(__name__)
 
+# Fields parsed out of the product search result text ("Price: ₦5,000")
+_PRICE_RE = re.compile(r'Price[:\s]+₦?\s*([\d,]+)')
+_NAME_RE = re.compile(r'Name[:\s]*([^\n]+)')
+
+# (user_id, product name) -> (price, clean_name) from the last search, so
+# "add two, then one more" doesn't repeat the POS search and parse
+RECENT_PRODUCT_TTL = 60
+_recent_products = TTLCache(maxsize=1024, ttl=RECENT_PRODUCT_TTL)
+
 
 @tool
-async def add_to_cart(product_name: str, quantity: int = 1, user_id: str = "default") -> str:
+async def add_to_cart(product_name: str, quantity: int = 1, user_id: str = "default") -> Dict:
     """Add a product to the shopping cart.
     
     Args:
@@ -23,36 +33,51 @@ async def add_to_cart(product_name: str, quantity: int = 1, user_id: str = "defa
         user_id: User identifier
         
     Returns:
-        Confirmation message with cart update
+        {"status", "name", "qty", "unit_price", "display"}; errors carry only
+        "status" and "display"
     """
     try:
         logger.info(f"🛒 ADD_TO_CART: {product_name} x{quantity} for {user_id}")
         
         # Validate quantity
         if quantity <= 0:
-            return "❌ Quantity must be greater than 0. Please specify a valid quantity."
-        
-        # Search for product to get accurate price and details
-        search_result = await search_products.ainvoke({"query": product_name, "user_id": user_id})
-        
-        # Parse product details from search result
-        price_match = re.search(r'Price[:\s]+([\\d,]+)', str(search_result))
-        if not price_match:
-            return f"❌ Could not find '{product_name}'. Please check the product name and try again."
-        
-        price = float(price_match.group(1).replace(',', ''))
-        
-        # Extract clean product name from search results
-        name_match = re.search(r'Name[:\s]*([^\\n]+)', str(search_result))
-        clean_name = name_match.group(1).strip() if name_match else product_name
+            return {"status": "error", "display": "❌ Quantity must be greater than 0. Please specify a valid quantity."}
+        
+        cache_key = (user_id, product_name.lower())
+        cached = _recent_products.get(cache_key)
+        if cached:
+            price, clean_name = cached
+        else:
+            # Search for product to get accurate price and details
+            search_result = await search_products.ainvoke({"query": product_name, "user_id": user_id})
+            
+            # Parse product details from search result
+            if not isinstance(search_result, str):
+                search_result = str(search_result)
+            price_match = _PRICE_RE.search(search_result)
+            if not price_match:
+                return {"status": "error", "display": f"❌ Could not find '{product_name}'. Please check the product name and try again."}
+            
+            price = float(price_match.group(1).replace(',', ''))
+            
+            # Extract clean product name from search results
+            name_match = _NAME_RE.search(search_result)
+            clean_name = name_match.group(1).strip() if name_match else product_name
+            _recent_products.set(cache_key, (price, clean_name))
         
         # Note: State update happens in sales_worker via returned tool evidence
-        # The sales_worker will parse this output and update ordered_items
-        return f"✅ Added *{clean_name}* x{quantity} (₦{price:,.0f} each) to your cart!"
+        # The sales_worker reads the structured fields to update ordered_items
+        return {
+            "status": "ok",
+            "name": clean_name,
+            "qty": quantity,
+            "unit_price": price,
+            "display": f"✅ Added *{clean_name}* x{quantity} (₦{price:,.0f} each) to your cart!",
+        }
         
     except Exception as e:
         logger.error(f"Error in add_to_cart: {e}", exc_info=True)
-        return f"❌ Sorry, I couldn't add '{product_name}' to your cart. Please try again or choose a different product."
+        return {"status": "error", "display": f"❌ Sorry, I couldn't add '{product_name}' to your cart. Please try again or choose a different product."}
 
 
 @tool
@@ -1,6 +1,7 @@
 """
 Database Tools: Order management and admin verification.
 """
+from functools import lru_cache
 from langchain.tools import tool
 from app.services.mcp_service import mcp_service
 from app.utils.config import settings
@@ -10,10 +11,21 @@ import json
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=1)
+def _admin_numbers() -> frozenset:
+    """Admin whitelist as a set, built on first use (cache_clear() after changing settings)."""
+    return frozenset(settings.ADMIN_PHONE_NUMBERS)
+
+
+def is_admin_phone(phone_number: str) -> bool:
+    """O(1) admin whitelist check for internal callers (no tool-invocation overhead)."""
+    return phone_number in _admin_numbers()
+
+
 @tool
 async def check_admin_whitelist(phone_number: str) -> bool:
     """Check if a phone number is in the admin whitelist."""
-    return phone_number in settings.ADMIN_PHONE_NUMBERS
+    return is_admin_phone(phone_number)
 
 
 @tool
@@ -2,6 +2,7 @@
 Fallback Payment Tools: Manual payment and error recovery options.
 """
 from langchain_core.tools import tool
+from app.services.mcp_service import mcp_service
 import logging
 
 logger = logging.getLogger(__name__)
@@ -68,8 +69,6 @@ async def check_api_health() -> str:
         Status message about API availability
     """
     try:
-        from app.services.mcp_service import mcp_service
-        
         # Quick health check
         result = await mcp_service.call_tool("payment", "verify_payment", {"reference": "health_check"})
         
@@ -32,8 +32,7 @@ async def get_pending_manual_payments(limit: int = 10) -> str:
                     user_id,
                     amount,
                     reference,
-                    created_at,
-                    delivery_details
+                    created_at
                 FROM orders
                 WHERE payment_status = 'manual_payment_pending'
                 ORDER BY created_at DESC
@@ -45,27 +44,25 @@ async def get_pending_manual_payments(limit: int = 10) -> str:
             if not rows:
                 return "✅ No pending manual payments to review."
             
-            output = f"💳 **Pending Manual Payments ({len(rows)})**\\n\\n"
-            output += "Review payment proof on WhatsApp and use `confirm_manual_payment` or `reject_manual_payment`\\n\\n"
+            parts = [
+                f"💳 **Pending Manual Payments ({len(rows)})**\\n\\n",
+                "Review payment proof on WhatsApp and use `confirm_manual_payment` or `reject_manual_payment`\\n\\n",
+            ]
             
             for row in rows:
-                r = dict(row._mapping)
-                user_id = r.get('user_id', 'Unknown')
+                user_id = row.user_id
                 masked_id = f"...{user_id[-10:]}" if len(user_id) > 10 else user_id
-                amount = r.get('amount', 0)
-                reference = r.get('reference', 'N/A')
-                created = r.get('created_at', 'N/A')
                 
-                output += f"""---
+                parts.append(f"""---
 **Customer:** {masked_id}
-**Amount:** ₦{amount:,.2f}
-**Reference:** {reference}
-**Requested:** {created}
+**Amount:** ₦{row.amount:,.2f}
+**Reference:** {row.reference}
+**Requested:** {row.created_at}
 **Action:** Check WhatsApp for payment proof from {masked_id}
 
-"""
+""")
             
-            return output
+            return "".join(parts)
             
     except Exception as e:
         logger.error(f"Error getting pending payments: {e}", exc_info=True)
@@ -147,12 +144,9 @@ Reference: {reference}
 Thank you for your patience! 💕"""
             
             try:
-                send_result = await meta_service.send_whatsapp_message(
-                    recipient_id=customer_id,
-                    message_text=confirmation_message
-                )
+                send_result = await meta_service.send_whatsapp_text(customer_id, confirmation_message)
                 
-                if send_result:
+                if send_result and send_result.get("status") != "error":
                     notification_status = "✅ Customer notified via WhatsApp"
                 else:
                     notification_status = "⚠️ Payment confirmed but WhatsApp notification failed"
@@ -248,12 +242,9 @@ Please:
 We're here to help! 💙"""
             
             try:
-                send_result = await meta_service.send_whatsapp_message(
-                    recipient_id=customer_id,
-                    message_text=rejection_message
-                )
+                send_result = await meta_service.send_whatsapp_text(customer_id, rejection_message)
                 
-                if send_result:
+                if send_result and send_result.get("status") != "error":
                     notification_status = "✅ Customer notified via WhatsApp"
                 else:
                     notification_status = "⚠️ Payment rejected but WhatsApp notification failed"
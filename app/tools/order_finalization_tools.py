@@ -2,6 +2,7 @@
 Order Finalization Tools: Calculate final totals with delivery fees.
 """
 from langchain_core.tools import tool
+from app.tools.tomtom_tools import calculate_delivery_fee
 from typing import List, Dict
 import logging
 import re
@@ -43,7 +44,6 @@ async def get_order_total_with_delivery(
             delivery_status = "FREE (Pickup)"
         else:
             try:
-                from app.tools.tomtom_tools import calculate_delivery_fee
                 delivery_result = await calculate_delivery_fee.ainvoke({"location": delivery_location})
                 
                 # Extract fee from result
@@ -2,6 +2,7 @@
 Order Management Tools: Convert cart to structured order data for payment.
 """
 from langchain_core.tools import tool
+from app.tools.tomtom_tools import calculate_delivery_fee
 from typing import List, Dict
 import logging
 
@@ -81,7 +82,6 @@ async def get_cart_total(ordered_items: List[Dict], delivery_location: str = Non
         # Calculate delivery fee if location provided
         if delivery_location:
             try:
-                from app.tools.tomtom_tools import calculate_delivery_fee
                 delivery_result = await calculate_delivery_fee.ainvoke({"location": delivery_location})
                 
                 # Extract fee from result (assuming format: "Delivery fee: ₦X" or similar)
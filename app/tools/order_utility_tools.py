@@ -4,14 +4,67 @@ Order Management Utility Tools: Admin tools for viewing and searching orders.
 from langchain_core.tools import tool
 from sqlalchemy import text
 from app.services.db_service import AsyncSessionLocal
+import json
 import logging
 from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
+_Q_RECENT_ORDERS = text("""
+    SELECT 
+        id,
+        user_id,
+        amount,
+        payment_status,
+        created_at
+    FROM orders
+    WHERE created_at >= :cutoff
+      AND (CAST(:before AS timestamptz) IS NULL
+           OR (created_at, id) < (CAST(:before AS timestamptz), :before_id))
+    ORDER BY created_at DESC, id DESC
+    LIMIT :limit
+""")
+
+_Q_CUSTOMER_ORDERS = text("""
+    SELECT 
+        id,
+        amount,
+        payment_status,
+        created_at,
+        verified_at
+    FROM orders
+    WHERE user_id = :user_id
+    ORDER BY created_at DESC
+    LIMIT :limit
+""")
+
+_Q_ORDER_DETAILS = text("""
+    SELECT 
+        id,
+        user_id,
+        amount,
+        payment_status,
+        delivery_details,
+        created_at,
+        verified_at,
+        verification_notes,
+        reference
+    FROM orders
+    WHERE id = :order_id
+""")
+
+
+def _parse_cursor(before: str) -> tuple:
+    """Split a "Next page" cursor ("<created_at>|<id>") into bind values; the id
+    is bound as int when numeric, matching how it was read back."""
+    created_at, _, order_id = before.partition("|")
+    if order_id.isdigit():
+        order_id = int(order_id)
+    return datetime.fromisoformat(created_at), order_id or None
+
 
 @tool
-async def get_recent_orders(limit: int = 10, hours: int = 24) -> str:
+async def get_recent_orders(limit: int = 10, hours: int = 24, before: str = None) -> str:
     """Get recent orders within specified time period.
     
     Useful for manager to check what orders came in recently.
@@ -19,6 +72,7 @@ async def get_recent_orders(limit: int = 10, hours: int = 24) -> str:
     Args:
         limit: Maximum number of orders to show (default: 10)
         hours: Look back this many hours (default: 24)
+        before: Page cursor - pass the "Next page" value from a previous call
         
     Returns:
         Formatted list of recent orders with key details
@@ -27,20 +81,15 @@ async def get_recent_orders(limit: int = 10, hours: int = 24) -> str:
         async with AsyncSessionLocal() as session:
             cutoff_time = datetime.now() - timedelta(hours=hours)
             
-            query = text("""
-                SELECT 
-                    id,
-                    user_id,
-                    amount,
-                    payment_status,
-                    delivery_details,
-                    created_at
-                FROM orders
-                WHERE created_at >= :cutoff
-                ORDER BY created_at DESC
-                LIMIT :limit
-            """)
-            result = await session.execute(query, {"cutoff": cutoff_time, "limit": limit})
+            # Keyset pagination: seek past the last (created_at, id) seen instead of
+            # OFFSET; the id breaks ties between orders created in one transaction
+            before_ts, before_id = _parse_cursor(before) if before else (None, None)
+            result = await session.execute(_Q_RECENT_ORDERS, {
+                "cutoff": cutoff_time,
+                "before": before_ts,
+                "before_id": before_id,
+                "limit": limit
+            })
             rows = result.fetchall()
             
             if not rows:
@@ -73,6 +122,10 @@ Time: {created}
 
 """
             
+            if len(rows) == limit:
+                last = rows[-1]
+                output += f"➡️ Next page: before={last.created_at.isoformat()}|{last.id}"
+            
             return output
             
     except Exception as e:
@@ -104,20 +157,7 @@ async def search_order_by_customer(customer_phone: str, limit: int = 5) -> str:
                 clean_phone = "+234" + clean_phone
         
         async with AsyncSessionLocal() as session:
-            query = text("""
-                SELECT 
-                    id,
-                    amount,
-                    payment_status,
-                    delivery_details,
-                    created_at,
-                    verified_at
-                FROM orders
-                WHERE user_id = :user_id
-                ORDER BY created_at DESC
-                LIMIT :limit
-            """)
-            result = await session.execute(query, {"user_id": clean_phone, "limit": limit})
+            result = await session.execute(_Q_CUSTOMER_ORDERS, {"user_id": clean_phone, "limit": limit})
             rows = result.fetchall()
             
             if not rows:
@@ -174,21 +214,7 @@ async def view_order_details(order_id: int) -> str:
     """
     try:
         async with AsyncSessionLocal() as session:
-            query = text("""
-                SELECT 
-                    id,
-                    user_id,
-                    amount,
-                    payment_status,
-                    delivery_details,
-                    created_at,
-                    verified_at,
-                    verification_notes,
-                    reference
-                FROM orders
-                WHERE id = :order_id
-            """)
-            result = await session.execute(query, {"order_id": order_id})
+            result = await session.execute(_Q_ORDER_DETAILS, {"order_id": order_id})
             row = result.fetchone()
             
             if not row:
@@ -214,7 +240,6 @@ async def view_order_details(order_id: int) -> str:
             
             # Parse delivery details
             if isinstance(delivery_details, str):
-                import json
                 try:
                     delivery_details = json.loads(delivery_details)
                 except:
@@ -5,6 +5,10 @@ from langchain.tools import tool
 from sqlalchemy import text
 from app.services.mcp_service import mcp_service
 from app.services.db_service import AsyncSessionLocal
+from app.services.meta_service import meta_service
+from app.utils.config import settings
+from pathlib import Path
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,9 +20,6 @@ async def alert_manager_non_skincare(user_id: str, category: str, product_name:
     Called internally when detecting non-skincare inquiries.
     """
     try:
-        from app.services.meta_service import meta_service
-        from app.utils.config import settings
-        
         message = (
             f"📢 Non-skincare inquiry\n"
             f"Customer: {user_id}\n"
@@ -195,8 +196,6 @@ async def search_pos_direct(query: str) -> str:
     logger.info(f"MCP returned no results or error. Using local mock data fallback.")
     
     try:
-        import json
-        from pathlib import Path
         mock_path = Path(__file__).parent.parent.parent / "mocks" / "products.json"
         with open(mock_path, "r") as f:
             data = json.load(f)
@@ -245,6 +244,21 @@ async def search_pos_direct(query: str) -> str:
     
     return f"No matching skincare products found for '{query}'."
 
+POS_SYNC_BATCH_SIZE = 10_000
+
+POS_QUEUE_ORDER = text("UPDATE orders SET status = 'queued_for_pos' WHERE order_id = :oid RETURNING order_id")
+
+# Bulk price/stock update: arrays are unnested into rows and joined on SKU
+POS_SYNC_UPDATE = text("""
+    UPDATE products AS p
+    SET price = v.price,
+        metadata = jsonb_set(COALESCE(p.metadata, '{}'), '{inventory_count}', v.qty::jsonb)
+    FROM unnest(CAST(:skus AS text[]), CAST(:prices AS float8[]), CAST(:qtys AS text[])) AS v(sku, price, qty)
+    WHERE p.sku = v.sku
+    RETURNING p.sku
+""")
+
+
 @tool
 async def sync_inventory_from_pos(data: list) -> str:
     """
@@ -257,25 +271,20 @@ async def sync_inventory_from_pos(data: list) -> str:
     count = 0
     try:
         async with AsyncSessionLocal() as session:
-            for item in data:
-                sku = item.get('sku')
-                qty = item.get('qty', 0)
-                price = item.get('price')
-                
-                # Update product logic
-                # Finding by SKU
-                result = await session.execute(text("SELECT product_id FROM products WHERE sku = :sku"), {"sku": sku})
-                prod_row = result.fetchone()
-                
-                if prod_row:
-                    # Update (simplified query, avoiding ORM overhead for bulk speed in tool)
-                    await session.execute(
-                        text("UPDATE products SET price = :price, metadata = jsonb_set(COALESCE(metadata, '{}'), '{inventory_count}', :qty) WHERE sku = :sku"),
-                        {"price": price, "qty": str(qty), "sku": sku}
-                    )
-                    count += 1
-                else:
-                    logger.warning(f"Product SKU {sku} not found for sync.")
+            # One multi-row UPDATE per batch instead of a SELECT + UPDATE per item
+            for start in range(0, len(data), POS_SYNC_BATCH_SIZE):
+                batch = data[start:start + POS_SYNC_BATCH_SIZE]
+                skus = [item.get('sku') for item in batch]
+                result = await session.execute(POS_SYNC_UPDATE, {
+                    "skus": skus,
+                    "prices": [item.get('price') for item in batch],
+                    "qtys": [str(item.get('qty', 0)) for item in batch],
+                })
+                synced = {row.sku for row in result}
+                count += len(synced)
+                for sku in skus:
+                    if sku not in synced:
+                        logger.warning(f"Product SKU {sku} not found for sync.")
             
             await session.commit()
             return f"Synced {count} items from POS."
@@ -291,17 +300,13 @@ async def push_order_to_pos(order_id: str) -> str:
     """
     try:
         async with AsyncSessionLocal() as session:
-            # Check if order exists
-            result = await session.execute(text("SELECT status FROM orders WHERE order_id = :oid"), {"oid": order_id})
-            order = result.fetchone()
-            if not order:
-                return f"Order {order_id} not found."
-            
-            # Update status to indicate ready for POS
-            await session.execute(
-                text("UPDATE orders SET status = 'queued_for_pos' WHERE order_id = :oid"),
+            # Update status to indicate ready for POS (no row returned = order doesn't exist)
+            result = await session.execute(
+                POS_QUEUE_ORDER,
                 {"oid": order_id}
             )
+            if not result.fetchone():
+                return f"Order {order_id} not found."
             await session.commit()
             return f"Order {order_id} queued for POS sync."
     except Exception as e:
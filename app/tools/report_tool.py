@@ -59,10 +59,11 @@ async def generate_comprehensive_report(start_date: str, end_date: str = None) -
         logger.info(f"Generating report for {start} to {end}")
         
         # Stage 1: Data Gathering
-        unique_users = await logging_service.get_unique_users_for_period(start_dt, end_dt)
-        messages = await logging_service.get_messages_for_period(start_dt, end_dt)
-        user_messages = [m for m in messages if m.get("role") == "user"]
-        avg_sentiment = sum(m.get("sentiment_score", 0) for m in user_messages) / max(len(user_messages), 1)
+        # One pass over message_logs for every message metric
+        stats = await logging_service.get_period_stats(start_dt, end_dt)
+        unique_users = stats["unique_users"]
+        total_messages = stats["total_messages"]
+        avg_sentiment = stats["avg_sentiment"]
         aggregated = await summary_service.get_aggregated_summary(start, end)
         total_orders = aggregated.get("total_orders", 0)
         total_revenue = aggregated.get("total_revenue", 0.0)
@@ -80,17 +81,14 @@ async def generate_comprehensive_report(start_date: str, end_date: str = None) -
             })
         customer_data.sort(key=lambda x: x["purchases"], reverse=True)
         
-        # Stage 3: Pattern Aggregation
-        intent_counts = {}
-        for msg in user_messages:
-            intent = msg.get("intent", "other")
-            intent_counts[intent] = intent_counts.get(intent, 0) + 1
+        # Stage 3: Pattern Aggregation (user intent counts, aggregated in SQL)
+        intent_counts = stats["intent_counts"]
         
         # Stage 4: LLM Synthesis with Fallback
         synthesis_prompt = f"""You are a business analyst for Ashandy Cosmetics.
 Generate: 1) 2-3 sentence Executive Summary, 2) 3 Key Insights, 3) 3 Recommendations
 
-DATA: Period: {start} to {end}, Messages: {len(messages)}, Customers: {len(unique_users)},
+DATA: Period: {start} to {end}, Messages: {total_messages}, Customers: {len(unique_users)},
 Sentiment: {avg_sentiment:.2f}, Intents: {intent_counts}, Orders: {total_orders}, Revenue: N{total_revenue:,.0f}
 Top Customers: {customer_data[:5]}
 
@@ -127,7 +125,7 @@ Be concise. No markdown."""
         pdf.set_font("Arial", "B", 12)
         pdf.cell(0, 8, "KEY METRICS", ln=True)
         pdf.set_font("Arial", "", 10)
-        for label, val in [("Messages", len(messages)), ("Customers", len(unique_users)), ("Sentiment", f"{avg_sentiment:.2f}"), ("Orders", total_orders), ("Revenue", f"N{total_revenue:,.0f}")]:
+        for label, val in [("Messages", total_messages), ("Customers", len(unique_users)), ("Sentiment", f"{avg_sentiment:.2f}"), ("Orders", total_orders), ("Revenue", f"N{total_revenue:,.0f}")]:
             pdf.cell(80, 6, f"{label}:", 0)
             pdf.cell(0, 6, str(val), ln=True)
         
@@ -136,7 +134,7 @@ Be concise. No markdown."""
         abs_path = os.path.abspath(filename)
         logger.info(f"PDF report: {abs_path}")
         
-        return f"✅ Report generated!\n\nFile: {abs_path}\n\nPeriod: {start} to {end}\nCustomers: {len(unique_users)}\nMessages: {len(messages)}\nRevenue: N{total_revenue:,.0f}"
+        return f"✅ Report generated!\n\nFile: {abs_path}\n\nPeriod: {start} to {end}\nCustomers: {len(unique_users)}\nMessages: {total_messages}\nRevenue: N{total_revenue:,.0f}"
         
     except Exception as e:
         logger.error(f"Report error: {e}", exc_info=True)
@@ -2,6 +2,7 @@
 SMS Tools: Twilio SMS for rider notifications and manager alerts.
 """
 from langchain.tools import tool
+from app.services.meta_service import meta_service
 from app.utils.config import settings
 import logging
 from typing import Optional
@@ -66,9 +67,6 @@ async def notify_manager(
         email: Customer email (optional)
         manager_phone: Manager's phone (uses ADMIN_PHONE_NUMBERS[0] if not provided)
     """
-    from app.services.meta_service import meta_service
-    from app.utils.config import settings
-    
     logger.info(f"Manager notification for order {order_id}")
     
     # Determine manager phone
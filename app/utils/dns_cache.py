@@ -0,0 +1,155 @@
+"""
+DNS Cache: httpcore network backend that memoizes hostname resolution.
+
+Each new pooled connection to graph.facebook.com would otherwise trigger
+a fresh getaddrinfo() call. Resolved addresses are kept for a short TTL;
+connects try each cached address in turn (so IPv4/IPv6 fallback still
+works) and the entry is dropped once none of them can be reached.
+"""
+import asyncio
+import contextlib
+import ipaddress
+import logging
+import socket
+from typing import List
+
+import httpcore
+import httpx
+
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class CachedDNSBackend(httpcore.AsyncNetworkBackend):
+    """Wraps the default AnyIO backend, resolving hosts through a TTL cache."""
+
+    def __init__(self, ttl: float = 60.0, maxsize: int = 64):
+        self._backend = httpcore.AnyIOBackend()
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def _resolve(self, host: str, port: int) -> List[str]:
+        try:
+            ipaddress.ip_address(host)
+            return [host]
+        except ValueError:
+            pass
+
+        addresses = self._cache.get(host)
+        if addresses is None:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+            # getaddrinfo's order is the preferred connect order; drop duplicates only
+            addresses = list(dict.fromkeys(info[4][0] for info in infos))
+            self._cache.set(host, addresses)
+        return addresses
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        addresses = await self._resolve(host, port)
+        for index, address in enumerate(addresses):
+            try:
+                # TLS SNI / Host still use the original hostname (set by httpcore from the origin)
+                stream = await self._backend.connect_tcp(
+                    address, port, timeout=timeout, local_address=local_address, socket_options=socket_options
+                )
+            except Exception as e:
+                if index == len(addresses) - 1:
+                    if address != host:
+                        self._cache.pop(host)
+                    raise
+                logger.debug(f"Connect to {host} via {address} failed ({e}), trying next address")
+                continue
+            if index:
+                # Lead with the address that worked until the entry expires
+                self._cache.set(host, addresses[index:] + addresses[:index])
+            return stream
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._backend.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    async def sleep(self, seconds: float):
+        await self._backend.sleep(seconds)
+
+
+@contextlib.contextmanager
+def _map_httpcore_errors(request: httpx.Request):
+    """Re-raise httpcore errors as the httpx exception of the same name (ConnectError, ReadTimeout, ...)."""
+    try:
+        yield
+    except httpcore.TimeoutException as e:
+        raise getattr(httpx, type(e).__name__, httpx.TimeoutException)(str(e), request=request) from e
+    except (httpcore.NetworkError, httpcore.ProtocolError, httpcore.ProxyError, httpcore.UnsupportedProtocol) as e:
+        raise getattr(httpx, type(e).__name__, httpx.TransportError)(str(e), request=request) from e
+
+
+class _PoolResponseStream(httpx.AsyncByteStream):
+    def __init__(self, stream, request: httpx.Request):
+        self._stream = stream
+        self._request = request
+
+    async def __aiter__(self):
+        with _map_httpcore_errors(self._request):
+            async for part in self._stream:
+                yield part
+
+    async def aclose(self):
+        if hasattr(self._stream, "aclose"):
+            await self._stream.aclose()
+
+
+class CachedDNSTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport over an httpcore connection pool built with CachedDNSBackend.
+
+    The pool's network_backend is a public httpcore constructor argument, so
+    this doesn't depend on httpx internals.
+    """
+
+    def __init__(
+        self,
+        limits: httpx.Limits = httpx.Limits(),
+        socket_options=None,
+        dns_ttl: float = 60.0,
+    ):
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            retries=0,
+            socket_options=socket_options,
+            network_backend=CachedDNSBackend(ttl=dns_ttl),
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        core_request = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(
+                scheme=request.url.raw_scheme,
+                host=request.url.raw_host,
+                port=request.url.port,
+                target=request.url.raw_path,
+            ),
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions=request.extensions,
+        )
+        with _map_httpcore_errors(request):
+            response = await self._pool.handle_async_request(core_request)
+        return httpx.Response(
+            status_code=response.status,
+            headers=response.headers,
+            stream=_PoolResponseStream(response.stream, request),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self):
+        await self._pool.aclose()
+
+
+def cached_dns_transport(**kwargs) -> CachedDNSTransport:
+    """
+    Build a transport (TCP_NODELAY, no transport-level retries) whose
+    connection pool resolves hostnames through CachedDNSBackend.
+    """
+    kwargs.setdefault("socket_options", [(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)])
+    return CachedDNSTransport(**kwargs)
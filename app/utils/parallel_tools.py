@@ -72,6 +72,13 @@ def can_parallelize(tool_names: List[str]) -> bool:
     return True
 
 
+def _evidence(name: str, args: Dict[str, Any], output: Any) -> Dict[str, Any]:
+    """Build an evidence entry; structured outputs keep their payload under "data"."""
+    if isinstance(output, dict) and "display" in output:
+        return {"tool": name, "args": args, "output": str(output["display"])[:500], "data": output}
+    return {"tool": name, "args": args, "output": str(output)[:500]}
+
+
 async def execute_tools_smart(
     tool_calls: List[Dict[str, Any]],
     tool_executor: Callable[[str, Dict[str, Any]], Awaitable[str]]
@@ -84,7 +91,8 @@ async def execute_tools_smart(
         tool_executor: async function(name, args) -> output
     
     Returns:
-        List of {"tool": name, "args": args, "output": output}
+        List of {"tool": name, "args": args, "output": output}, plus "data"
+        for tools returning a structured dict with a "display" string
     """
     if not tool_calls:
         return []
@@ -102,7 +110,7 @@ async def execute_tools_smart(
             args = tc.get("args", tc.get("function", {}).get("arguments", {}))
             try:
                 output = await tool_executor(name, args)
-                return {"tool": name, "args": args, "output": str(output)[:500]}
+                return _evidence(name, args, output)
             except Exception as e:
                 logger.error(f"Tool {name} failed: {e}")
                 return {"tool": name, "args": args, "output": f"Error: {str(e)}"}
@@ -119,7 +127,7 @@ async def execute_tools_smart(
             args = tc.get("args", tc.get("function", {}).get("arguments", {}))
             try:
                 output = await tool_executor(name, args)
-                results.append({"tool": name, "args": args, "output": str(output)[:500]})
+                results.append(_evidence(name, args, output))
             except Exception as e:
                 logger.error(f"Tool {name} failed: {e}")
                 results.append({"tool": name, "args": args, "output": f"Error: {str(e)}"})
@@ -25,6 +25,13 @@ def search_products(query: str, top_k: int = 5) -> str:
         return "Error: Vector store not initialized."
     return vector_store.search(query, top_k)
 
+@mcp.tool()
+def search_products_batch(queries: list[str], top_k: int = 5) -> str:
+    """Search products for several queries at once. Returns a JSON list of result strings."""
+    if not vector_store:
+        return json.dumps(["Error: Vector store not initialized."] * len(queries))
+    return json.dumps(vector_store.search_many(queries, top_k))
+
 @mcp.tool()
 def save_interaction(user_id: str, user_msg: str, ai_msg: str) -> str:
     """Save user interaction to memory."""
@@ -49,5 +56,19 @@ def analyze_and_enrich(image_url: str) -> str:
     # ensuring we return a string description
     return "Visual search not fully implemented in this version yet."
 
+@mcp.tool()
+def get_text_embeddings_batch(texts: list[str]) -> str:
+    """Embed many texts in one call. Returns a JSON list of vectors."""
+    if not vector_store:
+        return "[]"
+    return json.dumps(vector_store.get_text_embeddings(texts))
+
+@mcp.tool()
+def upsert_response_cache_batch(items: list[dict]) -> str:
+    """Store many cached responses (id, vector, metadata) in one upsert."""
+    if not vector_store:
+        return "Error: Vector store not initialized."
+    return vector_store.upsert_response_cache_batch(items)
+
 if __name__ == "__main__":
     mcp.run(transport="stdio")
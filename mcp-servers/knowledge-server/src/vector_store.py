@@ -1,6 +1,7 @@
 import os
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pinecone import Pinecone, ServerlessSpec
 # Lazy import for performance and robustness
 # from sentence_transformers import SentenceTransformer (Moved inside class)
@@ -9,6 +10,11 @@ from pinecone import Pinecone, ServerlessSpec
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("knowledge-store")
 
+# Pinecone accepts at most 100 vectors per upsert request
+UPSERT_BATCH_SIZE = 100
+# The Index client is synchronous; fan independent requests out over a small pool
+_io_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="pinecone")
+
 class VectorStore:
     def __init__(self):
         self.api_key = os.getenv("PINECONE_API_KEY")
@@ -19,12 +25,18 @@ class VectorStore:
         
         self.pc = None
         self.model = None
+        self._indexes = {}
 
         # Initialize Pinecone
         if self.api_key:
             try:
                 self.pc = Pinecone(api_key=self.api_key)
                 # Indexes checked on demand or async to speed up init
+                for name in (self.index_name_products, self.index_name_visual, self.index_name_memory):
+                    try:
+                        self._index(name)
+                    except Exception:
+                        pass  # Retried on first use
             except Exception as e:
                 logger.error(f"Pinecone Init Failed: {e}")
         else:
@@ -44,23 +56,96 @@ class VectorStore:
         except Exception as e:
             logger.error(f"Model Load Failed: {e}")
 
+    def _index(self, index_name: str):
+        """
+        Return a cached Index handle. pc.Index() resolves the index host and
+        sets up a fresh connection pool, so build each handle only once.
+        """
+        index = self._indexes.get(index_name)
+        if index is None:
+            try:
+                index = self._indexes[index_name] = self.pc.Index(index_name)
+            except Exception as e:
+                logger.warning(f"Could not open index {index_name}: {e}")
+                raise
+        return index
+
     def _ensure_index_exists(self, index_name: str, dimension: int):
+        self.ensure_indexes({index_name: dimension})
+
+    def ensure_indexes(self, specs: dict, max_wait: float = 300.0):
+        """
+        Create any missing indexes from {name: dimension}, then wait for all of
+        them together, polling with exponential backoff (1s doubling, capped at 10s).
+        """
         if not self.pc: return
         try:
-            existing = [i.name for i in self.pc.list_indexes()]
-            if index_name not in existing:
-                logger.info(f"Creating index: {index_name}")
+            existing = {i.name for i in self.pc.list_indexes()}
+            pending = [name for name in specs if name not in existing]
+            for name in pending:
+                logger.info(f"Creating index: {name}")
                 self.pc.create_index(
-                    name=index_name,
-                    dimension=dimension,
+                    name=name,
+                    dimension=specs[name],
                     metric="cosine",
                     spec=ServerlessSpec(cloud="aws", region="us-east-1")
                 )
-                while not self.pc.describe_index(index_name).status['ready']:
-                    time.sleep(1)
+
+            delay, deadline = 1.0, time.monotonic() + max_wait
+            while pending and time.monotonic() < deadline:
+                time.sleep(delay)
+                delay = min(delay * 2, 10.0)
+                pending = [name for name in pending if not self.pc.describe_index(name).status['ready']]
+            if pending:
+                logger.warning(f"Indexes not ready after {max_wait:.0f}s: {pending}")
         except Exception as e:
             logger.warning(f"Index creation check failed (likely auth or quota): {e}")
 
+    def upsert_vectors(self, index_name: str, vectors: list) -> int:
+        """
+        Upsert (id, vector, metadata) tuples in 100-vector requests sent concurrently.
+        Returns the number of vectors written.
+        """
+        index = self._index(index_name)
+        chunks = [vectors[i:i + UPSERT_BATCH_SIZE] for i in range(0, len(vectors), UPSERT_BATCH_SIZE)]
+        list(_io_pool.map(lambda chunk: index.upsert(vectors=chunk), chunks))
+        return len(vectors)
+
+    def query_vectors_batch(self, index_name: str, vectors: list, top_k: int = 5, **kwargs) -> list:
+        """Run one query per vector concurrently; responses are returned in input order."""
+        index = self._index(index_name)
+        return list(_io_pool.map(
+            lambda vector: index.query(vector=vector, top_k=top_k, include_metadata=True, **kwargs),
+            vectors
+        ))
+
+    def _format_product_matches(self, matches: list) -> str:
+        if not matches:
+            return "No matching products found."
+        lines = ["Found relevant products:"]
+        for m in matches:
+            meta = m.get("metadata", {})
+            lines.append(f"- {meta.get('name', 'Unknown')} (Price: {meta.get('price', 'N/A')}, Source: {meta.get('source', 'unknown')})")
+        return "\n".join(lines) + "\n"
+
+    def search_many(self, queries: list, top_k: int = 5) -> list:
+        """
+        Search products for several queries: one batched encode, concurrent queries.
+        Returns one formatted result string per query.
+        """
+        if not self.pc or not self.model:
+            return ["Error: vector services unavailable."] * len(queries)
+        if not queries:
+            return []
+
+        try:
+            vectors = self.model.encode(queries).tolist()
+            responses = self.query_vectors_batch(self.index_name_products, vectors, top_k=top_k)
+            return [self._format_product_matches(r.get("matches", [])) for r in responses]
+        except Exception as e:
+            logger.error(f"Batch search error: {e}")
+            return [f"Search failed: {str(e)}"] * len(queries)
+
     def search(self, query: str, top_k: int = 5) -> str:
         """
         Embed query -> Search Pinecone -> Return formatted string.
@@ -70,7 +155,7 @@ class VectorStore:
 
         try:
             vector = self.model.encode(query).tolist()
-            index = self.pc.Index(self.index_name_products)
+            index = self._index(self.index_name_products)
             
             response = index.query(
                 vector=vector,
@@ -78,20 +163,8 @@ class VectorStore:
                 include_metadata=True
             )
             
-            matches = response.get("matches", [])
-            if not matches:
-                return "No matching products found."
-            
             # Format results similar to original to keep Agent happy
-            result_str = "Found relevant products:\n"
-            for m in matches:
-                meta = m.get("metadata", {})
-                name = meta.get("name", "Unknown")
-                price = meta.get("price", "N/A")
-                source = meta.get("source", "unknown")
-                result_str += f"- {name} (Price: {price}, Source: {source})\n"
-                
-            return result_str
+            return self._format_product_matches(response.get("matches", []))
 
         except Exception as e:
             logger.error(f"Search Error: {e}")
@@ -109,7 +182,7 @@ class VectorStore:
             if not id:
                 id = str(time.time()) # Simple ID
             
-            index = self.pc.Index(self.index_name_products)
+            index = self._index(self.index_name_products)
             index.upsert(vectors=[
                 (id, vector, metadata)
             ])
@@ -129,7 +202,7 @@ class VectorStore:
             dim = len(vector)
             index_name = self.index_name_visual if dim == 768 else self.index_name_products
             
-            index = self.pc.Index(index_name)
+            index = self._index(index_name)
             index.upsert(vectors=[
                 (id, vector, metadata)
             ])
@@ -148,26 +221,14 @@ class VectorStore:
             dim = len(vector)
             index_name = self.index_name_visual if dim == 768 else self.index_name_products
             
-            index = self.pc.Index(index_name)
+            index = self._index(index_name)
             response = index.query(
                 vector=vector,
                 top_k=top_k,
                 include_metadata=True
             )
             
-            matches = response.get("matches", [])
-            if not matches:
-                return "No matching products found."
-            
-            result_str = "Found relevant products:\n"
-            for m in matches:
-                meta = m.get("metadata", {})
-                name = meta.get("name", "Unknown")
-                price = meta.get("price", "N/A")
-                source = meta.get("source", "unknown")
-                result_str += f"- {name} (Price: {price}, Source: {source})\n"
-                
-            return result_str
+            return self._format_product_matches(response.get("matches", []))
             
         except Exception as e:
             return f"Search Vector failed: {str(e)}"
@@ -181,7 +242,7 @@ class VectorStore:
             
         try:
             vector = self.model.encode(query).tolist()
-            index = self.pc.Index(self.index_name_memory)
+            index = self._index(self.index_name_memory)
             
             response = index.query(
                 vector=vector,
@@ -220,7 +281,7 @@ class VectorStore:
                 "type": "interaction"
             })
             
-            index = self.pc.Index(self.index_name_memory)
+            index = self._index(self.index_name_memory)
             index.upsert(vectors=[
                 (vector_id, vector, metadata)
             ])
@@ -243,6 +304,19 @@ class VectorStore:
             logger.error(f"Embedding generation failed: {e}")
             return []
 
+    def get_text_embeddings(self, texts: list) -> list:
+        """
+        Generate embeddings for many texts in one batched encode() call.
+        Returns a list of 384-dimension vectors (empty list on failure).
+        """
+        if not self.model or not texts:
+            return []
+        try:
+            return self.model.encode(texts).tolist()
+        except Exception as e:
+            logger.error(f"Batch embedding generation failed: {e}")
+            return []
+
     def search_response_cache(self, vector: list, threshold: float = 0.92, top_k: int = 1) -> list:
         """
         Search cached responses by vector similarity.
@@ -253,7 +327,7 @@ class VectorStore:
             
         try:
             # Use memory index for response cache (384-dim)
-            index = self.pc.Index(self.index_name_memory)
+            index = self._index(self.index_name_memory)
             
             response = index.query(
                 vector=vector,
@@ -288,7 +362,7 @@ class VectorStore:
             # Add type marker for filtering
             metadata["type"] = "response_cache"
             
-            index = self.pc.Index(self.index_name_memory)
+            index = self._index(self.index_name_memory)
             index.upsert(vectors=[
                 (id, vector, metadata)
             ])
@@ -296,3 +370,19 @@ class VectorStore:
         except Exception as e:
             return f"Response cache upsert failed: {str(e)}"
 
+    def upsert_response_cache_batch(self, items: list) -> str:
+        """
+        Store many cached responses in one upsert.
+        Each item is {"id": ..., "vector": [...], "metadata": {...}}.
+        """
+        if not self.pc:
+            return "Error: Pinecone unavailable."
+            
+        try:
+            self.upsert_vectors(self.index_name_memory, [
+                (item["id"], item["vector"], {**item["metadata"], "type": "response_cache"})
+                for item in items
+            ])
+            return f"Cached {len(items)} responses."
+        except Exception as e:
+            return f"Response cache batch upsert failed: {str(e)}"
@@ -2,15 +2,27 @@ from mcp.server.fastmcp import FastMCP
 from src.paystack_client import PaystackClient
 import logging
 import asyncio
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Initialize Server
-mcp = FastMCP("ashandy-payment")
 client = PaystackClient()
 
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    """Close the pooled Paystack connection when the server shuts down."""
+    try:
+        yield
+    finally:
+        await client.aclose()
+
+
+# Initialize Server
+mcp = FastMCP("ashandy-payment", lifespan=lifespan)
+
 @mcp.tool()
 async def initialize_payment(email: str, amount_ngn: float, user_id: str) -> str:
     """
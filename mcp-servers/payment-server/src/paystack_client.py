@@ -1,13 +1,27 @@
+import asyncio
 import httpx
 import os
 import logging
+import time
 import uuid
+from collections import OrderedDict
 from typing import Dict, Any, Optional
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("payment-client")
 
+MAX_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.5
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# Verify results: terminal statuses never change, pending ones are only
+# held long enough to coalesce a burst of webhook/callback checks
+TERMINAL_STATUSES = {"success", "failed", "abandoned", "reversed"}
+VERIFY_TERMINAL_TTL = 86400
+VERIFY_PENDING_TTL = 5
+VERIFY_CACHE_SIZE = 2048
+
 class PaystackClient:
     def __init__(self):
         self.secret_key = os.getenv("PAYSTACK_SECRET_KEY", "")
@@ -19,6 +33,66 @@ class PaystackClient:
             "Authorization": f"Bearer {self.secret_key}",
             "Content-Type": "application/json"
         }
+        self._client: Optional[httpx.AsyncClient] = None
+        self._verify_cache: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+
+    def _cached_verify(self, reference: str) -> Optional[str]:
+        entry = self._verify_cache.get(reference)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            del self._verify_cache[reference]
+            return None
+        self._verify_cache.move_to_end(reference)
+        return result
+
+    def _store_verify(self, reference: str, result: str, ttl: float):
+        self._verify_cache[reference] = (time.monotonic() + ttl, result)
+        self._verify_cache.move_to_end(reference)
+        while len(self._verify_cache) > VERIFY_CACHE_SIZE:
+            self._verify_cache.popitem(last=False)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        One pooled client for the life of the server, built on first call so
+        importing the module does no network setup. Keep-alive reuses the
+        TLS connection to api.paystack.co instead of a handshake per call.
+        """
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                timeout=10.0,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _request(self, method: str, path: str, idempotent: bool, **kwargs) -> httpx.Response:
+        """
+        Send a request, retrying transient failures with exponential backoff.
+        Non-idempotent calls (initialize) are only retried when the connection
+        was never established, so Paystack can't see the same request twice.
+        """
+        retry_errors = (httpx.TransportError,) if idempotent else (httpx.ConnectError, httpx.ConnectTimeout)
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                response = await self.client.request(method, path, **kwargs)
+                if idempotent and response.status_code in RETRYABLE_STATUS and attempt < MAX_ATTEMPTS:
+                    logger.warning(f"Paystack {path} returned {response.status_code}, retrying ({attempt}/{MAX_ATTEMPTS})")
+                else:
+                    return response
+            except retry_errors as e:
+                if attempt == MAX_ATTEMPTS:
+                    raise
+                logger.warning(f"Paystack {path} failed: {e}, retrying ({attempt}/{MAX_ATTEMPTS})")
+            await asyncio.sleep(RETRY_BASE_DELAY * 2 ** (attempt - 1))
 
     async def initialize_transaction(self, email: str, amount_ngn: float, user_id: str) -> str:
         """
@@ -30,8 +104,6 @@ class PaystackClient:
         Returns:
             JSON string with authorization_url and reference.
         """
-        url = f"{self.base_url}/transaction/initialize"
-        
         # Convert to Kobo
         amount_kobo = int(float(amount_ngn) * 100)
         reference = f"ASHDY_{uuid.uuid4().hex[:12]}"
@@ -46,20 +118,19 @@ class PaystackClient:
         logger.info(f"Initializing Payment for {email}: {amount_ngn} NGN")
         
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(url, headers=self.headers, json=payload)
-                
-                if response.status_code != 200:
-                    return f"Error: Paystack API failed ({response.status_code}) - {response.text}"
-                
-                data = response.json()
-                if data.get("status"):
-                    # Return formatted string for Agent usage
-                    auth_url = data["data"]["authorization_url"]
-                    ref = data["data"]["reference"]
-                    return f"SUCCESS|{auth_url}|{ref}"
-                else:
-                    return f"Error: {data.get('message')}"
+            response = await self._request("POST", "/transaction/initialize", idempotent=False, json=payload)
+
+            if response.status_code != 200:
+                return f"Error: Paystack API failed ({response.status_code}) - {response.text}"
+
+            data = response.json()
+            if data.get("status"):
+                # Return formatted string for Agent usage
+                auth_url = data["data"]["authorization_url"]
+                ref = data["data"]["reference"]
+                return f"SUCCESS|{auth_url}|{ref}"
+            else:
+                return f"Error: {data.get('message')}"
 
         except Exception as e:
             logger.error(f"Paystack Init Error: {e}")
@@ -68,24 +139,30 @@ class PaystackClient:
     async def verify_transaction(self, reference: str) -> str:
         """
         Verify status of a transaction.
+        Terminal results are served from cache for repeat checks.
         """
-        url = f"{self.base_url}/transaction/verify/{reference}"
-        
+        cached = self._cached_verify(reference)
+        if cached is not None:
+            logger.info(f"Paystack verify cache hit: {reference}")
+            return cached
+
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(url, headers=self.headers)
-                 
-                if response.status_code != 200:
-                    return f"Error: Verification failed ({response.status_code})"
-                
-                data = response.json()
-                if data.get("status"):
-                    tx_data = data["data"]
-                    status = tx_data.get("status")
-                    amount = float(tx_data.get("amount", 0)) / 100
-                    return f"Transaction Status: {status.upper()} | Amount: ₦{amount:,.2f}"
-                else:
-                    return f"Error: {data.get('message')}"
+            response = await self._request("GET", f"/transaction/verify/{reference}", idempotent=True)
+
+            if response.status_code != 200:
+                return f"Error: Verification failed ({response.status_code})"
+
+            data = response.json()
+            if data.get("status"):
+                tx_data = data["data"]
+                status = tx_data.get("status")
+                amount = float(tx_data.get("amount", 0)) / 100
+                result = f"Transaction Status: {status.upper()} | Amount: ₦{amount:,.2f}"
+                ttl = VERIFY_TERMINAL_TTL if status in TERMINAL_STATUSES else VERIFY_PENDING_TTL
+                self._store_verify(reference, result, ttl)
+                return result
+            else:
+                return f"Error: {data.get('message')}"
                     
         except Exception as e:
              logger.error(f"Paystack Verify Error: {e}")
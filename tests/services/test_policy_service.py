@@ -0,0 +1,84 @@
+"""
+Unit tests for the file-based policy RAG (PolicyService).
+"""
+import pytest
+from app.services.policy_service import PolicyService
+
+
+@pytest.fixture
+def service():
+    return PolicyService()
+
+
+class TestSearchPolicies:
+    """Tests for keyword scoring in search_policies."""
+
+    @pytest.mark.parametrize("query,expected", [
+        ("How much is delivery to Lagos?", "delivery"),
+        ("I want to pay with card transfer", "payment"),
+        ("can I get a refund, the product is damaged", "returns_refunds"),
+        ("why do you need my phone number", "privacy"),
+        ("I want to speak to a manager", "escalation"),
+        ("recommend something for oily skin", "product_recommendations"),
+    ])
+    def test_top_policy(self, service, query, expected):
+        results = service.search_policies(query)
+        assert results[0][0] == expected
+
+    def test_no_keywords_returns_nothing(self, service):
+        assert service.search_policies("hello") == []
+
+    def test_single_word_keywords_must_start_a_word(self, service):
+        # "fee" / "card" must not fire inside "coffee" / "discarded"
+        assert service.search_policies("coffee and a discarded wrapper") == []
+
+    @pytest.mark.parametrize("query,expected", [
+        ("how do returns work", "returns_refunds"),
+        ("can I get refunds", "returns_refunds"),
+        ("I was refunded twice", "returns_refunds"),
+        ("my order was cancelled", "returns_refunds"),
+        ("what payments do you take", "payment"),
+        ("any recommendations?", "product_recommendations"),
+        ("I'm consulting a friend", "consultation"),
+    ])
+    def test_inflected_keywords_match(self, service, query, expected):
+        assert service.search_policies(query)[0][0] == expected
+
+    def test_phrase_also_counts_contained_keyword(self, service):
+        # "help me with" (safety) also counts "help" (escalation)
+        names = [name for name, _ in service.search_policies("help me with my essay")]
+        assert names == ["safety", "escalation"]
+
+    def test_max_results(self, service):
+        assert len(service.search_policies("delivery payment refund manager", max_results=3)) == 3
+
+    def test_ties_keep_declaration_order(self, service):
+        # "fee" (delivery) and "shop" (store_info) score the same
+        names = [name for name, _ in service.search_policies("shop fee")]
+        assert names == ["delivery", "store_info"]
+
+
+class TestRelevantContext:
+    """Tests for prompt context assembly."""
+
+    def test_context_has_policy_header(self, service):
+        context = service.get_relevant_context("How much is delivery to Lagos?")
+        assert context.startswith("--- Delivery Policy ---")
+
+    def test_context_respects_max_chars(self, service):
+        context = service.get_relevant_context("delivery payment", max_chars=300)
+        assert len(context) <= 300
+
+    def test_context_cached_per_keyword_signature(self, service):
+        first = service.get_relevant_context("How much is delivery?")
+        hits = service._build_context.cache_info().hits
+        assert service.get_relevant_context("delivery how much is it") == first
+        assert service._build_context.cache_info().hits == hits + 1
+
+    def test_context_cache_is_per_instance(self, service):
+        other = PolicyService()
+        service.get_relevant_context("How much is delivery?")
+        other.get_relevant_context("How much is delivery?")
+        other.reload()
+        assert other._build_context.cache_info().currsize == 0
+        assert service._build_context.cache_info().currsize == 1
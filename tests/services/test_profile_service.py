@@ -0,0 +1,45 @@
+"""
+Unit tests for the SQL retention score (ProfileService).
+
+The score is computed in Postgres, so these run only when TEST_DATABASE_URL
+points at a database (a plain postgresql:// DSN).
+"""
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+asyncpg = pytest.importorskip("asyncpg")
+pytest.importorskip("sqlalchemy")
+from app.services.profile_service import _SQL_RETENTION_SCORE
+
+DSN = os.getenv("TEST_DATABASE_URL")
+pytestmark = pytest.mark.skipif(not DSN, reason="TEST_DATABASE_URL not set")
+
+
+async def _score(last_interaction, message_count=0, avg_sentiment=0.0, total_purchases=0.0) -> float:
+    conn = await asyncpg.connect(DSN)
+    try:
+        return await conn.fetchval(
+            f"""
+            SELECT {_SQL_RETENTION_SCORE}
+            FROM (VALUES ($1::timestamptz, $2::int, $3::float8, $4::float8))
+                AS p(last_interaction, message_count, avg_sentiment, total_purchases)
+            """,
+            last_interaction, message_count, avg_sentiment, total_purchases,
+        )
+    finally:
+        await conn.close()
+
+
+class TestRetentionScore:
+    """Tests for the weighted RFM expression."""
+
+    @pytest.mark.asyncio
+    async def test_unknown_recency_is_neutral(self):
+        # 0.3 * 0.5 (recency default) + 0.2 * 0.5 (neutral sentiment)
+        assert await _score(None) == pytest.approx(0.25)
+
+    @pytest.mark.asyncio
+    async def test_recent_interaction_counts_fully(self):
+        assert await _score(datetime.now(timezone.utc)) == pytest.approx(0.4)
@@ -0,0 +1,44 @@
+"""
+Unit tests for keyword sentiment scoring and intent classification (SentimentService).
+"""
+import pytest
+from app.services.sentiment_service import SentimentService
+
+
+@pytest.fixture
+def service():
+    return SentimentService()
+
+
+class TestAnalyze:
+    """Tests for whole-word sentiment scoring."""
+
+    @pytest.mark.parametrize("text,expected", [
+        ("hi", 0.0),
+        ("nothing to add", 0.0),  # 'no' inside 'nothing'
+        ("this is not it", 0.0),  # 'no' inside 'not'
+        ("badge please", 0.6),  # 'bad' inside 'badge'
+        ("Thanks, I love it!", 0.75),  # love counts once plus its strong weight
+        ("This is a SCAM", -0.65),
+        ("good but broken", 0.0),
+    ])
+    def test_scores(self, service, text, expected):
+        assert service.analyze(text) == pytest.approx(expected)
+
+    def test_scores_are_clamped(self, service):
+        assert service.analyze(" ".join(service.POSITIVE_WORDS)) == 1.0
+        assert service.analyze(" ".join(service.NEGATIVE_WORDS)) == -1.0
+
+
+class TestClassifyIntent:
+    """Tests for priority-ordered intent classification."""
+
+    @pytest.mark.parametrize("text,expected", [
+        ("hello, how much is this serum?", "inquiry"),
+        ("hello, I'll take two", "purchase"),
+        ("it's not working, hello?", "complaint"),
+        ("Good morning", "greeting"),
+        ("ok", "other"),
+    ])
+    def test_intents(self, service, text, expected):
+        assert service.classify_intent(text) == expected
@@ -0,0 +1,47 @@
+"""
+Unit tests for CachedDNSBackend address caching and fallback.
+"""
+import pytest
+
+pytest.importorskip("httpcore")
+from app.utils.dns_cache import CachedDNSBackend
+
+
+class _FlakyBackend:
+    """Inner backend that refuses connections to the listed addresses."""
+
+    def __init__(self, down):
+        self.down = set(down)
+        self.attempts = []
+
+    async def connect_tcp(self, host, port, **kwargs):
+        self.attempts.append(host)
+        if host in self.down:
+            raise OSError(f"{host} unreachable")
+        return host
+
+
+def _backend(addresses, down=()):
+    backend = CachedDNSBackend()
+    backend._backend = _FlakyBackend(down)
+    backend._cache.set("graph.example.com", list(addresses))
+    return backend
+
+
+class TestCachedDNSBackend:
+    """Tests for multi-address connects."""
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_next_address(self):
+        backend = _backend(["10.0.0.1", "10.0.0.2"], down={"10.0.0.1"})
+        assert await backend.connect_tcp("graph.example.com", 443) == "10.0.0.2"
+        # The working address now leads
+        assert backend._cache.get("graph.example.com") == ["10.0.0.2", "10.0.0.1"]
+
+    @pytest.mark.asyncio
+    async def test_all_addresses_down_drops_entry(self):
+        backend = _backend(["10.0.0.1", "10.0.0.2"], down={"10.0.0.1", "10.0.0.2"})
+        with pytest.raises(OSError):
+            await backend.connect_tcp("graph.example.com", 443)
+        assert backend._backend.attempts == ["10.0.0.1", "10.0.0.2"]
+        assert "graph.example.com" not in backend._cache